@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 from apps.accounts.models import User
 from apps.tenants.models import TenantMembership
@@ -34,7 +35,7 @@ class UserTenantSerializer(serializers.ModelSerializer):
     tenant_name = serializers.CharField(source='tenant.name')
     tenant_slug = serializers.CharField(source='tenant.slug')
     plan_name = serializers.CharField(source='tenant.plan.name')
-    role_display = serializers.CharField(source='get_role_display')
+    role_display = serializers.CharField(source='get_role_display', read_only=True)
 
     class Meta:
         model = TenantMembership
@@ -52,10 +53,18 @@ class UserTenantSerializer(serializers.ModelSerializer):
 class ChangePasswordSerializer(serializers.Serializer):
     """Serializer para troca de senha."""
     old_password = serializers.CharField(required=False, allow_blank=True, allow_null=True)
-    new_password = serializers.CharField(required=True, validators=[validate_password])
+    new_password = serializers.CharField(required=True)
     confirm_password = serializers.CharField(required=True)
 
     def validate(self, attrs):
+        # Confirmação primeiro: evita rodar os validadores de senha à toa
         if attrs['new_password'] != attrs['confirm_password']:
             raise serializers.ValidationError({"confirm_password": "As senhas não conferem."})
+
+        request = self.context.get('request')
+        user = request.user if request else None
+        try:
+            validate_password(attrs['new_password'], user)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({"new_password": list(e.messages)}) from e
         return attrs
\ No newline at end of file
@@ -1,3 +1,6 @@
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -6,6 +9,34 @@ from rest_framework.views import APIView
 from apps.tenants.models import TenantMembership
 from ..serializers import UserSerializer, UserTenantSerializer, ChangePasswordSerializer
 
+# Memberships lidas por bloco do cursor na lista de tenants do usuário
+TENANTS_CHUNK_SIZE = 500
+
+
+def _me_etag(request, *args, **kwargs):
+    """ETag do usuário autenticado, baseado na última alteração do registro."""
+    user = request.user
+    last_change = user.updated_at or user.date_joined
+    return f'user-{user.pk}-{last_change.timestamp()}'
+
+
+def _user_tenants_etag(request, *args, **kwargs):
+    """
+    ETag da lista de tenants do usuário em uma única agregação.
+    Inclui memberships inativas e o total para detectar desativações/remoções.
+    """
+    stats = TenantMembership.objects.filter(user=request.user).aggregate(
+        total=Count('id'),
+        membership_updated=Max('updated_at'),
+        tenant_updated=Max('tenant__updated_at'),
+        plan_updated=Max('tenant__plan__updated_at'),
+    )
+    timestamps = [
+        str(value.timestamp()) if value else '0'
+        for value in (stats['membership_updated'], stats['tenant_updated'], stats['plan_updated'])
+    ]
+    return f"tenants-{request.user.pk}-{stats['total']}-{'-'.join(timestamps)}"
+
 
 class MeView(generics.RetrieveUpdateAPIView):
     """
@@ -18,18 +49,26 @@ class MeView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    @method_decorator(etag(_me_etag))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class UserTenantsView(APIView):
     """Retorna todos os tenants que o usuário tem acesso."""
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(etag(_user_tenants_etag))
     def get(self, request):
         memberships = TenantMembership.objects.filter(
             user=request.user,
             is_active=True,
         ).select_related('tenant', 'tenant__plan')
 
-        serializer = UserTenantSerializer(memberships, many=True)
+        # iterator: sem cache do queryset, mesmo para usuários com muitas memberships
+        serializer = UserTenantSerializer(
+            memberships.iterator(chunk_size=TENANTS_CHUNK_SIZE), many=True
+        )
         return Response(serializer.data)
 
 class ChangePasswordView(generics.GenericAPIView):
@@ -9,6 +9,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.stdout.write('Creating test data...')
+        ADMIN_ROLE = TenantMembership.Role.ADMIN
+        VIEWER_ROLE = TenantMembership.Role.VIEWER
 
         try:
             with transaction.atomic():
@@ -41,12 +43,10 @@ class Command(BaseCommand):
                         plan=plan
                     )
                     # Create Domain for Public Tenant
-                    if not Domain.objects.filter(domain='localhost').exists():
-                        Domain.objects.create(
-                            domain='localhost',
-                            tenant=public_client,
-                            is_primary=True
-                        )
+                    Domain.objects.get_or_create(
+                        domain='localhost',
+                        defaults={'tenant': public_client, 'is_primary': True}
+                    )
                     self.stdout.write(self.style.SUCCESS('Public Tenant created.'))
                 else:
                     self.stdout.write('Public Tenant already exists.')
@@ -64,12 +64,10 @@ class Command(BaseCommand):
                     # Create Domain for Demo Tenant
                     # We use a subdomain or a different port/domain depending on setup.
                     # Assuming 'demo.localhost' for now.
-                    if not Domain.objects.filter(domain='demo.localhost').exists():
-                        Domain.objects.create(
-                            domain='demo.localhost',
-                            tenant=demo_client,
-                            is_primary=True
-                        )
+                    Domain.objects.get_or_create(
+                        domain='demo.localhost',
+                        defaults={'tenant': demo_client, 'is_primary': True}
+                    )
                     self.stdout.write(self.style.SUCCESS('Demo Tenant created.'))
                 else:
                     self.stdout.write('Demo Tenant already exists.')
@@ -89,7 +87,8 @@ class Command(BaseCommand):
                     }
                 )
                 superuser.set_password('voxpop123')
-                superuser.save()
+                superuser.current_tenant = demo_client
+                superuser.save(update_fields=['password', 'current_tenant'])
                 if created:
                     self.stdout.write(self.style.SUCCESS(f'Superuser "{superuser.email}" created.'))
                 else:
@@ -105,7 +104,8 @@ class Command(BaseCommand):
                     }
                 )
                 admin_user.set_password('voxpop123')
-                admin_user.save()
+                admin_user.current_tenant = demo_client
+                admin_user.save(update_fields=['password', 'current_tenant'])
                 if created:
                     self.stdout.write(self.style.SUCCESS(f'Admin User "{admin_user.email}" created.'))
                 else:
@@ -121,40 +121,35 @@ class Command(BaseCommand):
                     }
                 )
                 common_user.set_password('voxpop123')
-                common_user.save()
+                common_user.current_tenant = demo_client
+                common_user.save(update_fields=['password', 'current_tenant'])
                 if created:
                     self.stdout.write(self.style.SUCCESS(f'Common User "{common_user.email}" created.'))
                 else:
                     self.stdout.write(f'Common User "{common_user.email}" updated (password reset).')
 
-                # 5. Assign Memberships
-                # Admin -> Demo Tenant (Admin)
-                if not TenantMembership.objects.filter(user=admin_user, tenant=demo_client).exists():
-                    TenantMembership.objects.create(
-                        user=admin_user,
-                        tenant=demo_client,
-                        role=TenantMembership.Role.ADMIN
-                    )
-                    self.stdout.write(self.style.SUCCESS(f'Assigned Admin role to {admin_user.email} in Demo Tenant.'))
-
-                # User -> Demo Tenant (Viewer)
-                if not TenantMembership.objects.filter(user=common_user, tenant=demo_client).exists():
-                    TenantMembership.objects.create(
-                        user=common_user,
-                        tenant=demo_client,
-                        role=TenantMembership.Role.VIEWER
-                    )
-                    self.stdout.write(self.style.SUCCESS(f'Assigned Viewer role to {common_user.email} in Demo Tenant.'))
-                
-                # Set current_tenant for easier login
-                admin_user.current_tenant = demo_client
-                admin_user.save()
-                common_user.current_tenant = demo_client
-                common_user.save()
-                
-                # Superuser doesn't necessarily need a current_tenant, but setting it doesn't hurt
-                superuser.current_tenant = demo_client 
-                superuser.save()
+                # 5. Assign Memberships (current_tenant is already set in the saves above)
+                TenantMembership.objects.bulk_create(
+                    [
+                        # Admin -> Demo Tenant (Admin)
+                        TenantMembership(
+                            user=admin_user,
+                            tenant=demo_client,
+                            role=ADMIN_ROLE
+                        ),
+                        # User -> Demo Tenant (Viewer)
+                        TenantMembership(
+                            user=common_user,
+                            tenant=demo_client,
+                            role=VIEWER_ROLE
+                        ),
+                    ],
+                    ignore_conflicts=True,
+                    batch_size=500
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f'Memberships checked: {admin_user.email} (Admin), {common_user.email} (Viewer) in Demo Tenant.'
+                ))
 
             self.stdout.write(self.style.SUCCESS('All test data checked/created successfully!'))
             self.stdout.write('---------------------------------------------------------')
@@ -4,6 +4,8 @@ Custom User model for VoxPop.
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 
+from apps.tenants.models import Client, TenantMembership
+
 
 class UserManager(BaseUserManager):
     """Custom user manager that uses email as the unique identifier."""
@@ -61,6 +63,11 @@ class User(AbstractUser):
         null=True,
     )
 
+    updated_at = models.DateTimeField(
+        'Atualizado em',
+        auto_now=True,
+    )
+
     # Tenant atual (para facilitar navegação)
     current_tenant = models.ForeignKey(
         'tenants.Client',
@@ -94,17 +101,25 @@ class User(AbstractUser):
         return self.first_name or self.email.split('@')[0]
 
     def get_tenants(self):
-        """Retorna todos os tenants que o usuário tem acesso."""
-        from apps.tenants.models import TenantMembership
-        return [
-            m.tenant for m in TenantMembership.objects.filter(
-                user=self, is_active=True
-            ).select_related('tenant')
-        ]
+        """Retorna todos os tenants que o usuário tem acesso (um único JOIN com memberships)."""
+        return list(Client.objects.filter(
+            memberships__user=self, memberships__is_active=True
+        ))
 
     def get_membership(self, tenant):
-        """Retorna a membership do usuário para um tenant específico."""
-        from apps.tenants.models import TenantMembership
-        return TenantMembership.objects.filter(
+        """
+        Retorna a membership ativa do usuário para um tenant específico.
+        O resultado (inclusive None) fica em cache na instância, evitando uma
+        query por permission check na mesma requisição.
+        """
+        if not hasattr(self, '_membership_cache'):
+            self._membership_cache = {}
+        if tenant.pk in self._membership_cache:
+            return self._membership_cache[tenant.pk]
+
+        membership = TenantMembership.objects.filter(
             user=self, tenant=tenant, is_active=True
         ).first()
+        self._membership_cache[tenant.pk] = membership
+        return membership
+
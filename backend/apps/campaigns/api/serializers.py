@@ -17,7 +17,7 @@ class CampaignItemSerializer(serializers.ModelSerializer):
 class CampaignListSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     whatsapp_session_name = serializers.CharField(source='whatsapp_session.name', read_only=True)
-    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    created_by_name = serializers.CharField(source='created_by_full_name', read_only=True)
 
     class Meta:
         model = Campaign
@@ -33,13 +33,6 @@ class CampaignDetailSerializer(CampaignListSerializer):
     target_tags_display = serializers.StringRelatedField(source='target_tags', many=True)
     target_segment_name = serializers.CharField(source='target_segment.name', read_only=True)
 
-    # Métricas computadas a partir dos itens reais (fonte de verdade)
-    total_recipients = serializers.SerializerMethodField()
-    messages_sent = serializers.SerializerMethodField()
-    messages_delivered = serializers.SerializerMethodField()
-    messages_read = serializers.SerializerMethodField()
-    messages_failed = serializers.SerializerMethodField()
-
     class Meta(CampaignListSerializer.Meta):
         fields = CampaignListSerializer.Meta.fields + [
             'message', 'media_url', 'media_type',
@@ -48,27 +41,11 @@ class CampaignDetailSerializer(CampaignListSerializer):
             'target_tags', 'target_tags_display', 'target_groups',
             'items', 'whatsapp_session'
         ]
-
-    def _get_items(self, obj):
-        """Cache dos itens para evitar múltiplas queries."""
-        if not hasattr(obj, '_cached_items_list'):
-            obj._cached_items_list = list(obj.items.all())
-        return obj._cached_items_list
-
-    def get_total_recipients(self, obj):
-        return len(self._get_items(obj))
-
-    def get_messages_sent(self, obj):
-        return sum(1 for i in self._get_items(obj) if i.status in ('sent', 'delivered', 'read'))
-
-    def get_messages_delivered(self, obj):
-        return sum(1 for i in self._get_items(obj) if i.status in ('delivered', 'read'))
-
-    def get_messages_read(self, obj):
-        return sum(1 for i in self._get_items(obj) if i.status == 'read')
-
-    def get_messages_failed(self, obj):
-        return sum(1 for i in self._get_items(obj) if i.status == 'failed')
+        # Contadores mantidos pelo envio/webhooks (CampaignItem.update_campaign_counters)
+        read_only_fields = [
+            'total_recipients', 'messages_sent', 'messages_delivered',
+            'messages_read', 'messages_failed'
+        ]
 
 class CampaignCreateSerializer(serializers.ModelSerializer):
     target_groups = serializers.ListField(
@@ -1,14 +1,19 @@
+import io
 import os
-import uuid
+import secrets
+import shutil
 
 from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+from django.db.models import CharField, Prefetch, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from django.utils import timezone
 from rest_framework import viewsets, status, decorators
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.campaigns.models import Campaign
+from apps.campaigns.models import Campaign, CampaignItem
 from apps.campaigns.api.serializers import (
     CampaignListSerializer,
     CampaignDetailSerializer,
@@ -19,17 +24,102 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-ALLOWED_MEDIA_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'mp4', 'pdf'}
+ALLOWED_MEDIA_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'gif', 'mp4', 'pdf'})
+_ALLOWED_EXT_MSG = f"Extensão não permitida. Permitidas: {', '.join(sorted(ALLOWED_MEDIA_EXTENSIONS))}"
+MEDIA_TYPE_MAP = {
+    'jpg': 'image',
+    'jpeg': 'image',
+    'png': 'image',
+    'gif': 'image',
+    'mp4': 'video',
+    'pdf': 'document',
+}
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+# Ações que renderizam CampaignDetailSerializer (com os itens)
+DETAIL_ACTIONS = ('retrieve', 'update', 'partial_update')
+
+# Equivalente SQL de User.get_full_name (nome completo ou, se vazio, e-mail)
+CREATED_BY_FULL_NAME = Coalesce(
+    NullIf(
+        Trim(Concat('created_by__first_name', Value(' '), 'created_by__last_name')),
+        Value('')
+    ),
+    'created_by__email',
+    output_field=CharField(),
+)
+
+
+def _store_upload(file, filepath):
+    """
+    Grava o upload em disco evitando cópias em user space quando possível:
+    hard link do arquivo temporário (mesmo filesystem), senão sendfile, senão
+    cópia com buffer grande.
+    """
+    if isinstance(file, TemporaryUploadedFile):
+        try:
+            os.link(file.temporary_file_path(), filepath)
+            os.chmod(filepath, 0o644)  # tempfile é criado com 0o600
+            return
+        except OSError:
+            pass  # Filesystems diferentes: segue para a cópia
+
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    with os.fdopen(fd, 'wb') as dest:
+        if isinstance(file, InMemoryUploadedFile):
+            # Já está em memória: uma única escrita
+            dest.write(file.read())
+            return
+
+        file.seek(0)
+        try:
+            in_fd = file.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            in_fd = None
+
+        if in_fd is None or not hasattr(os, 'sendfile'):
+            shutil.copyfileobj(file, dest, length=UPLOAD_COPY_BUFFER_SIZE)
+            return
+
+        offset = 0
+        while offset < file.size:
+            sent = os.sendfile(fd, in_fd, offset, file.size - offset)
+            if not sent:
+                break
+            offset += sent
+
 
 class CampaignViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         # Filtra campanhas do tenant atual (já tratado pelo middleware + django-tenants)
-        return Campaign.objects.all().select_related(
+        if self.action == 'list':
+            # Projeção restrita aos campos de CampaignListSerializer
+            return Campaign.objects.select_related('whatsapp_session').only(
+                'id', 'name', 'description', 'status', 'scheduled_at',
+                'total_recipients', 'messages_sent', 'messages_delivered',
+                'messages_read', 'messages_failed', 'created_at',
+                'whatsapp_session__name',
+            ).annotate(created_by_full_name=CREATED_BY_FULL_NAME)
+
+        queryset = Campaign.objects.all().select_related(
             'whatsapp_session', 'created_by', 'target_segment'
-        ).prefetch_related('target_tags', 'items')
+        ).prefetch_related('target_tags').annotate(
+            created_by_full_name=CREATED_BY_FULL_NAME
+        )
+
+        # Ações (start/pause/destroy) não renderizam os itens
+        if self.action not in DETAIL_ACTIONS:
+            return queryset
+
+        items_queryset = CampaignItem.objects.only(
+            'id', 'campaign_id', 'status', 'recipient_name', 'recipient_phone',
+            'sent_at', 'delivered_at', 'read_at', 'error_message'
+        )
+
+        return queryset.prefetch_related(Prefetch('items', queryset=items_queryset))
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -89,30 +179,21 @@ class CampaignViewSet(viewsets.ModelViewSet):
         ext = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else ''
         if ext not in ALLOWED_MEDIA_EXTENSIONS:
             return Response(
-                {"detail": f"Extensão não permitida. Permitidas: {', '.join(ALLOWED_MEDIA_EXTENSIONS)}"},
+                {"detail": _ALLOWED_EXT_MSG},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # Determinar media_type
-        if ext in ('jpg', 'jpeg', 'png', 'gif'):
-            media_type = 'image'
-        elif ext == 'mp4':
-            media_type = 'video'
-        elif ext == 'pdf':
-            media_type = 'document'
-        else:
-            media_type = 'image'
+        media_type = MEDIA_TYPE_MAP.get(ext, 'image')
 
         # Salvar arquivo
         upload_dir = os.path.join(settings.MEDIA_ROOT, 'campaigns')
         os.makedirs(upload_dir, exist_ok=True)
 
-        filename = f"{uuid.uuid4().hex}.{ext}"
+        filename = f"{secrets.token_hex(16)}.{ext}"
         filepath = os.path.join(upload_dir, filename)
 
-        with open(filepath, 'wb+') as dest:
-            for chunk in file.chunks():
-                dest.write(chunk)
+        _store_upload(file, filepath)
 
         media_url = request.build_absolute_uri(f'{settings.MEDIA_URL}campaigns/{filename}')
 
@@ -125,13 +206,19 @@ class CampaignViewSet(viewsets.ModelViewSet):
     @decorators.action(detail=True, methods=['post'])
     def pause(self, request, pk=None):
         """Pausa o envio da campanha."""
+        # get_object: 404, escopo do queryset e permissões de objeto
         campaign = self.get_object()
-        if campaign.status != Campaign.Status.RUNNING:
+
+        # UPDATE condicional: atômico contra workers concorrentes
+        updated = Campaign.objects.filter(
+            pk=campaign.pk, status=Campaign.Status.RUNNING
+        ).update(status=Campaign.Status.PAUSED, updated_at=timezone.now())
+
+        if not updated:
             return Response(
                 {"detail": "Apenas campanhas em andamento podem ser pausadas."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        campaign.status = Campaign.Status.PAUSED
-        campaign.save()
+        # O worker consulta o status pelo cache a cada envio
+        Campaign.cache_status(campaign.pk, Campaign.Status.PAUSED)
         return Response({"detail": "Campanha pausada."})
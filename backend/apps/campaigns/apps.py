@@ -5,3 +5,6 @@ class CampaignsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.campaigns'
     verbose_name = 'Campanhas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -5,24 +5,65 @@ Este comando:
 1. Busca todos os tenants (Client)
 2. Para cada tenant, busca campanhas completadas/rodando
 3. Para cada campanha, itera sobre todos os CampaignItems
-4. Conta itens com status delivered/read
-5. Atualiza messages_delivered e messages_read da campanha
-6. Marca a campanha como tendo métricas verificadas
+4. Conta os itens por status com as regras cumulativas de
+   CampaignItem.STATUS_COUNTERS (lida também conta como entregue e enviada)
+5. Atualiza total_recipients, messages_sent, messages_delivered,
+   messages_read e messages_failed da campanha
 
 Uso:
     python manage.py recalcular_metricas_campanhas              # Recalcula todas
     python manage.py recalcular_metricas_campanhas --campaign-id 123  # Recalcula apenas uma
     python manage.py recalcular_metricas_campanhas --dry-run    # Mostra o que será feito (dry run)
+    python manage.py recalcular_metricas_campanhas -v 2         # Detalha cada campanha
+    python manage.py recalcular_metricas_campanhas --workers 8  # Tenants em paralelo
+
+Por padrão cada tenant é recalculado com um único UPDATE ... FROM (SELECT ... GROUP BY)
+no banco, com vários tenants em paralelo (RECALC_WORKERS, padrão 4). O caminho
+campanha a campanha é sequencial e usado apenas com --dry-run ou -v 2.
 """
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connection, transaction
 from django_tenants.utils import schema_context
 from django_tenants.utils import get_tenant_model
 from apps.campaigns.models import Campaign, CampaignItem
+from apps.tenants.models import CampaignTenantIndex
 
 logger = logging.getLogger(__name__)
 
+# Campanhas cujas métricas são recalculadas
+RECALC_STATUSES = (Campaign.Status.COMPLETED, Campaign.Status.RUNNING)
+
+STATUS_DISPLAY = dict(Campaign.Status.choices)
+
+# Contadores recalculados (mesmos campos de CampaignItem.counter_aggregates)
+COUNTER_FIELDS = tuple(CampaignItem.counter_aggregates())
+
+# Únicos campos de Campaign lidos/gravados pelo caminho campanha a campanha
+RECALC_FIELDS = ('id', 'name', 'status', *COUNTER_FIELDS)
+
+
+def _recalculate_schema(schema_name):
+    """
+    Processa um tenant inteiro (executado em uma thread do pool).
+    Retorna (campanhas ativas/completadas, campanhas atualizadas).
+    """
+    try:
+        with schema_context(schema_name):
+            campaigns_count = Campaign.objects.filter(
+                status__in=RECALC_STATUSES
+            ).count()
+            if not campaigns_count:
+                return 0, 0
+            with transaction.atomic():
+                return campaigns_count, Campaign.recalculate_counters(RECALC_STATUSES)
+    finally:
+        # Cada thread abre sua própria conexão; libera ao terminar
+        connection.close()
+
 
 class Command(BaseCommand):
     help = 'Recalcular métricas de campanhas antigas baseadas nos CampaignItems'
@@ -43,10 +84,19 @@ class Command(BaseCommand):
             type=int,
             help='ID da campanha específica para processar',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=int(os.environ.get('RECALC_WORKERS', 4)),
+            help='Tenants processados em paralelo (padrão: RECALC_WORKERS ou 4)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options.get('dry_run', False)
         campaign_id = options.get('campaign_id')
+        verbose = options.get('verbosity', 1) >= 2
+        # Detalhes por campanha só com -v 2 (ou para uma campanha específica)
+        self.verbose = verbose or bool(campaign_id)
 
         self.stdout.write('='*80)
         self.stdout.write('RECALCULAR MÉTRICAS DE CAMPANHAS ANTIGAS')
@@ -58,21 +108,35 @@ class Command(BaseCommand):
         Client = get_tenant_model()
 
         if campaign_id:
-            # Para campanha específica, primeiro encontra o tenant
+            # Para campanha específica, primeiro encontra o tenant pelo índice
+            # no schema public (uma query em vez de uma por tenant)
             self.stdout.write(f'\n📊 Buscando campanha ID: {campaign_id}')
-            self.stdout.write('   Procurando em todos os tenants...')
 
-            # Itera sobre todos os tenants para encontrar a campanha
+            schema_names = list(
+                CampaignTenantIndex.objects.filter(
+                    campaign_id=campaign_id
+                ).values_list('schema_name', flat=True)
+            )
+            if not schema_names:
+                # Campanhas anteriores ao índice: varre os tenants
+                self.stdout.write('   Procurando em todos os tenants...')
+                schema_names = Client.objects.exclude(
+                    schema_name='public'
+                ).values_list('schema_name', flat=True)
+
             found = False
-            for tenant in Client.objects.exclude(schema_name='public'):
-                with schema_context(tenant.schema_name):
+            for schema_name in schema_names:
+                with schema_context(schema_name):
                     try:
-                        campaign = Campaign.objects.get(
+                        campaign = Campaign.objects.only(
+                            *RECALC_FIELDS
+                        ).get(
                             id=campaign_id,
-                            status__in=['completed', 'running']
+                            status__in=RECALC_STATUSES
                         )
                         found = True
-                        self._process_campaign(campaign, dry_run)
+                        if self._process_campaign(campaign, dry_run) and not dry_run:
+                            self._save_campaigns([campaign])
                         break
                     except Campaign.DoesNotExist:
                         continue
@@ -87,27 +151,71 @@ class Command(BaseCommand):
             total_campaigns_updated = 0
             total_campaigns_skipped = 0
 
-            for tenant in Client.objects.exclude(schema_name='public'):
-                self.stdout.write(f'\n📦 Tenant: {tenant.name} (schema: {tenant.schema_name})')
+            # Apenas tenants com alguma campanha (índice no schema public):
+            # tenants sem campanhas não chegam a trocar de schema
+            tenants = list(
+                Client.objects.exclude(schema_name='public').filter(
+                    schema_name__in=CampaignTenantIndex.objects.values('schema_name')
+                ).values_list('name', 'schema_name')
+            )
+
+            if not dry_run and not verbose:
+                # Caminho padrão: um UPDATE por tenant, tenants em paralelo
+                # (threads têm conexões próprias; limitado pelo pool do banco)
+                with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                    results = executor.map(
+                        _recalculate_schema, [schema_name for _, schema_name in tenants]
+                    )
+                    for (name, schema_name), (campaigns_count, updated_count) in zip(tenants, results, strict=True):
+                        self.stdout.write(f'\n📦 Tenant: {name} (schema: {schema_name})')
+                        if not campaigns_count:
+                            self.stdout.write('   ⏭️  Nenhuma campanha ativa/completada')
+                            continue
+                        self.stdout.write(
+                            f'   ✅ {updated_count} de {campaigns_count} campanha(s) atualizada(s)'
+                        )
+                        total_campaigns_processed += campaigns_count
+                        total_campaigns_updated += updated_count
+                        total_campaigns_skipped += campaigns_count - updated_count
+                tenants = []
+
+            for name, schema_name in tenants:
+                self.stdout.write(f'\n📦 Tenant: {name} (schema: {schema_name})')
 
-                with schema_context(tenant.schema_name):
+                with schema_context(schema_name):
                     campaigns = Campaign.objects.filter(
-                        status__in=['completed', 'running']
-                    )
+                        status__in=RECALC_STATUSES
+                    ).only(*RECALC_FIELDS)
 
-                    if not campaigns.exists():
+                    # Um único COUNT (sem exists() + count() separados)
+                    campaigns_count = campaigns.count()
+                    if not campaigns_count:
                         self.stdout.write('   ⏭️  Nenhuma campanha ativa/completada')
                         continue
 
-                    self.stdout.write(f'   📊 Encontradas {campaigns.count()} campanhas')
+                    self.stdout.write(f'   📊 Encontradas {campaigns_count} campanhas')
 
-                    for campaign in campaigns:
+                    # iterator: cursor no servidor, sem cache do queryset inteiro em memória
+                    dirty_campaigns = []
+                    tenant_updated = 0
+                    for campaign in campaigns.iterator(chunk_size=100):
                         updated = self._process_campaign(campaign, dry_run)
                         total_campaigns_processed += 1
                         if updated:
-                            total_campaigns_updated += 1
+                            tenant_updated += 1
+                            if not dry_run:
+                                dirty_campaigns.append(campaign)
                         else:
                             total_campaigns_skipped += 1
+                    total_campaigns_updated += tenant_updated
+
+                    if not self.verbose:
+                        self.stdout.write(
+                            f'   ⚠️  {tenant_updated} de {campaigns_count} campanha(s) com métricas incorretas'
+                        )
+
+                    # Um único bulk_update por tenant em vez de um save() por campanha
+                    self._save_campaigns(dirty_campaigns)
 
             # Resumo final
             self.stdout.write('')
@@ -124,74 +232,70 @@ class Command(BaseCommand):
                 self.stdout.write('⚠️  MODO DRY-RUN: Execute sem --dry-run para aplicar alterações')
                 self.stdout.write('='*80)
 
+    def _save_campaigns(self, campaigns):
+        """Persiste as métricas recalculadas em lote (um UPDATE por batch)."""
+        if not campaigns:
+            return
+
+        with transaction.atomic():
+            Campaign.objects.bulk_update(
+                campaigns,
+                COUNTER_FIELDS,
+                batch_size=500
+            )
+        self.stdout.write(f'   💾 {len(campaigns)} campanha(s) atualizada(s) no banco')
+
+    def _detail(self, message):
+        """Escreve detalhes por campanha apenas no modo verboso."""
+        if self.verbose:
+            self.stdout.write(message)
+
     def _process_campaign(self, campaign, dry_run=False):
         """
-        Processa uma única campanha e recalcular suas métricas.
-        Retorna True se atualizou, False se não precisava atualizar.
+        Processa uma única campanha e recalcula suas métricas em memória.
+        Retorna True se precisa atualizar (a persistência é feita por _save_campaigns),
+        False se não precisava atualizar.
         """
-        self.stdout.write(f'\n{"="*80}')
-        self.stdout.write(f'📢 Campanha: {campaign.name} (ID: {campaign.id})')
-        self.stdout.write(f'   Status: {campaign.get_status_display()}')
-
-        # Busca CampaignItems desta campanha
-        items = CampaignItem.objects.filter(campaign=campaign)
-
-        if not items.exists():
-            self.stdout.write('   ⏭️  Sem itens nesta campanha')
+        self._detail(f'\n{"="*80}')
+        self._detail(f'📢 Campanha: {campaign.name} (ID: {campaign.id})')
+        self._detail(f'   Status: {STATUS_DISPLAY.get(campaign.status, campaign.status)}')
+
+        # Contadores corretos a partir dos CampaignItems (uma única query),
+        # com as mesmas regras cumulativas usadas na manutenção dos contadores
+        stats = CampaignItem.objects.filter(
+            campaign=campaign
+        ).aggregate(**CampaignItem.counter_aggregates())
+
+        if stats['total_recipients'] == 0:
+            self._detail('   ⏭️  Sem itens nesta campanha')
             return False
 
-        # Conta métricas corretas baseadas em CampaignItems
-        total_items = items.count()
-        delivered_count = items.filter(status='delivered').count()
-        read_count = items.filter(status='read').count()
-        sent_count = items.filter(status='sent').count()
-        failed_count = items.filter(status='failed').count()
-
-        # Para campanhas concluídas, considera itens 'sent' como 'delivered'
-        # pois provavelmente foram entregues mas o webhook não atualizou
-        if campaign.status == 'completed' and sent_count > 0:
-            delivered_count += sent_count
-            self.stdout.write(f'   ℹ️  Campanha concluída: considerando {sent_count} itens "sent" como "delivered"')
-
-        self.stdout.write(f'   Total de itens: {total_items}')
-        self.stdout.write(f'   ✅ Delivered: {delivered_count}')
-        self.stdout.write(f'   📖 Read: {read_count}')
-        self.stdout.write(f'   ❌ Failed: {failed_count}')
-
-        # Busca métricas atuais da campanha
-        current_delivered = campaign.messages_delivered
-        current_read = campaign.messages_read
-
-        self.stdout.write(f'   Métricas atuais no banco:')
-        self.stdout.write(f'      messages_delivered: {current_delivered}')
-        self.stdout.write(f'      messages_read: {current_read}')
-
-        # Verifica se precisa recalcular
-        needs_update = (
-            current_delivered != delivered_count or
-            current_read != read_count
-        )
+        self._detail(f'   Total de itens: {stats["total_recipients"]}')
+        self._detail(f'   📤 Sent: {stats["messages_sent"]}')
+        self._detail(f'   ✅ Delivered: {stats["messages_delivered"]}')
+        self._detail(f'   📖 Read: {stats["messages_read"]}')
+        self._detail(f'   ❌ Failed: {stats["messages_failed"]}')
+
+        # Contadores divergentes entre o banco e os itens
+        mismatched = [
+            field for field in COUNTER_FIELDS if getattr(campaign, field) != stats[field]
+        ]
+        if not mismatched:
+            self._detail(f'   ✅ Métricas já estão corretas')
+            return False
 
-        if needs_update:
-            self.stdout.write(f'   ⚠️  Métricas incorretas detectadas!')
-            if current_delivered != delivered_count:
-                diff = current_delivered - delivered_count
-                self.stdout.write(f'      Diferença delivered: {diff} (banco vs items)')
-            if current_read != read_count:
-                diff = current_read - read_count
-                self.stdout.write(f'      Diferença read: {diff} (banco vs items)')
-
-            if not dry_run:
-                # Recalcula métricas
-                campaign.messages_delivered = delivered_count
-                campaign.messages_read = read_count
-                campaign.save(update_fields=['messages_delivered', 'messages_read'])
-
-                self.stdout.write(f'   ✅ Atualizado: delivered={delivered_count}, read={read_count}')
-            else:
-                self.stdout.write(f'   ✓ DRY-RUN: Seria atualizado para delivered={delivered_count}, read={read_count}')
-
-            return True
+        self._detail(f'   ⚠️  Métricas incorretas detectadas!')
+        for field in mismatched:
+            diff = getattr(campaign, field) - stats[field]
+            self._detail(f'      Diferença {field}: {diff} (banco vs items)')
+
+        summary = ', '.join(f'{field}={stats[field]}' for field in COUNTER_FIELDS)
+        if not dry_run:
+            # Recalcula métricas (persistidas em lote por _save_campaigns)
+            for field in COUNTER_FIELDS:
+                setattr(campaign, field, stats[field])
+            self._detail(f'   ✅ Recalculado: {summary}')
         else:
-            self.stdout.write(f'   ✅ Métricas já estão corretas')
-            return False
+            self._detail(f'   ✓ DRY-RUN: Seria atualizado para {summary}')
+
+        return True
@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('campaigns', '0004_campaign_message_template'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='campaignitem',
+            index=models.Index(
+                condition=models.Q(('status', 'pending')),
+                fields=['campaign'],
+                name='ci_campaign_pending_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('campaigns', '0005_campaignitem_ci_campaign_pending_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='campaignitem',
+            index=models.Index(
+                fields=['sent_at', 'status'],
+                include=['id'],
+                name='ci_sent_at_status_idx',
+            ),
+        ),
+    ]
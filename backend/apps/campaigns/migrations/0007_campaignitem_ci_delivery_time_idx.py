@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('campaigns', '0006_campaignitem_ci_sent_at_status_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='campaignitem',
+            index=models.Index(
+                condition=models.Q(('delivered_at__isnull', False), ('sent_at__isnull', False)),
+                fields=['campaign', 'sent_at', 'delivered_at'],
+                name='ci_delivery_time_idx',
+            ),
+        ),
+    ]
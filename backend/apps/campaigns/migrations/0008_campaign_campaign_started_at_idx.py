@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('campaigns', '0007_campaignitem_ci_delivery_time_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='campaign',
+            index=models.Index(
+                condition=models.Q(('started_at__isnull', False)),
+                fields=['started_at'],
+                name='campaign_started_at_idx',
+            ),
+        ),
+    ]
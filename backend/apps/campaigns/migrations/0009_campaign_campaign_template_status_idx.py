@@ -0,0 +1,20 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('campaigns', '0008_campaign_campaign_started_at_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='campaign',
+            index=models.Index(
+                fields=['message_template', 'status'],
+                name='campaign_template_status_idx',
+            ),
+        ),
+    ]
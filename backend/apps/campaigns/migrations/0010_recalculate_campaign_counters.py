@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Contadores gravados antes da manutenção cumulativa (webhooks duplicados
+# incrementavam duas vezes): recalculados a partir do status atual dos itens,
+# com as mesmas regras de CampaignItem.STATUS_COUNTERS
+RECALCULATE_COUNTERS_SQL = """
+    UPDATE campaigns_campaign AS c
+    SET total_recipients = s.total_recipients,
+        messages_sent = s.messages_sent,
+        messages_delivered = s.messages_delivered,
+        messages_read = s.messages_read,
+        messages_failed = s.messages_failed
+    FROM (
+        SELECT campaign_id,
+               COUNT(*) AS total_recipients,
+               COUNT(*) FILTER (WHERE status IN ('sent', 'delivered', 'read')) AS messages_sent,
+               COUNT(*) FILTER (WHERE status IN ('delivered', 'read')) AS messages_delivered,
+               COUNT(*) FILTER (WHERE status = 'read') AS messages_read,
+               COUNT(*) FILTER (WHERE status = 'failed') AS messages_failed
+        FROM campaigns_campaignitem
+        GROUP BY campaign_id
+    ) AS s
+    WHERE c.id = s.campaign_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0009_campaign_campaign_template_status_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RECALCULATE_COUNTERS_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
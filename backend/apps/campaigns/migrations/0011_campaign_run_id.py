@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0010_recalculate_campaign_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='run_id',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,8 +1,9 @@
 """
 Campaign models for VoxPop.
 """
-from django.db import models
+from django.db import connection, models
 from django.conf import settings
+from django.core.cache import cache
 from django_tenants.models import TenantMixin
 from core.models import SoftDeleteModel
 
@@ -104,6 +105,10 @@ class Campaign(SoftDeleteModel):
     
     # Timestamps de Execução
     started_at = models.DateTimeField(null=True, blank=True)
+
+    # Execução atual: renovado a cada início/retomada; a cadeia de
+    # process_campaign_batch de uma execução anterior encerra ao ver outro valor
+    run_id = models.UUIDField(null=True, blank=True, editable=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     
     created_by = models.ForeignKey(
@@ -117,10 +122,104 @@ class Campaign(SoftDeleteModel):
         verbose_name = 'Campanha'
         verbose_name_plural = 'Campanhas'
         ordering = ['-created_at']
+        indexes = [
+            # Campanhas iniciadas (atividades recentes e top campanhas do dashboard)
+            models.Index(
+                fields=['started_at'],
+                condition=models.Q(started_at__isnull=False),
+                name='campaign_started_at_idx',
+            ),
+            # Template em uso por campanhas ativas (exclusão de templates)
+            models.Index(fields=['message_template', 'status'], name='campaign_template_status_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    # Validade da cópia do status em cache (lida a cada envio pelo worker)
+    STATUS_CACHE_TIMEOUT = 3600
+
+    @staticmethod
+    def status_cache_key(campaign_id):
+        # IDs são por schema: o schema faz parte da chave
+        return f'campaign:{connection.schema_name}:{campaign_id}:status'
+
+    @classmethod
+    def cache_status(cls, campaign_id, status):
+        """Publica o status no cache; chamado em toda transição de status."""
+        cache.set(cls.status_cache_key(campaign_id), status, timeout=cls.STATUS_CACHE_TIMEOUT)
+
+    @classmethod
+    def get_cached_status(cls, campaign_id):
+        """
+        Retorna o status da campanha lendo do cache e, na falta, apenas a
+        coluna status no banco. Retorna None se a campanha não existir.
+        """
+        status = cache.get(cls.status_cache_key(campaign_id))
+        if status is None:
+            status = cls.objects.filter(pk=campaign_id).values_list('status', flat=True).first()
+            if status is not None:
+                cls.cache_status(campaign_id, status)
+        return status
+
+    # Recalcula os contadores a partir dos itens em um único UPDATE ... FROM
+    # (SELECT ... GROUP BY); só grava as campanhas com algum contador divergente
+    RECALCULATE_COUNTERS_SQL = """
+        UPDATE {campaign_table} AS c
+        SET {assignments}
+        FROM (
+            SELECT campaign_id, {aggregates}
+            FROM {item_table}
+            GROUP BY campaign_id
+        ) AS s
+        WHERE c.id = s.campaign_id AND c.deleted_at IS NULL
+          AND ({mismatch}){extra_where}
+    """
+
+    @classmethod
+    def recalculate_counters(cls, statuses=None):
+        """
+        Recalcula total_recipients e os contadores de mensagens das campanhas
+        (não excluídas) do schema atual, ou só das com status em `statuses`, pelo
+        status atual dos itens, com as regras cumulativas de STATUS_COUNTERS.
+        Retorna o número de campanhas corrigidas.
+        """
+        counter_statuses = CampaignItem.counter_statuses()
+        fields = ['total_recipients', *counter_statuses]
+        aggregates = ['COUNT(*) AS total_recipients']
+        params = []
+        for field, item_statuses in counter_statuses.items():
+            aggregates.append(f'COUNT(*) FILTER (WHERE status = ANY(%s)) AS {field}')
+            params.append(list(item_statuses))
+
+        extra_where = ''
+        if statuses is not None:
+            extra_where = ' AND c.status = ANY(%s)'
+            params.append(list(statuses))
+
+        sql = cls.RECALCULATE_COUNTERS_SQL.format(
+            campaign_table=cls._meta.db_table,
+            item_table=CampaignItem._meta.db_table,
+            assignments=', '.join(f'{field} = s.{field}' for field in fields),
+            aggregates=', '.join(aggregates),
+            mismatch=' OR '.join(f'c.{field} <> s.{field}' for field in fields),
+            extra_where=extra_where,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    @classmethod
+    def apply_counter_deltas(cls, campaign_id, deltas):
+        """
+        Aplica deltas nos contadores denormalizados em um único UPDATE com F(),
+        atômico mesmo com workers/webhooks concorrentes.
+        """
+        if deltas:
+            cls.objects.filter(pk=campaign_id).update(**{
+                field: models.F(field) + delta for field, delta in deltas.items()
+            })
+
 
 class CampaignItem(models.Model):
     """
@@ -134,6 +233,19 @@ class CampaignItem(models.Model):
         READ = 'read', 'Lida'
         FAILED = 'failed', 'Falha'
 
+    # Status cumulativos: uma mensagem lida também foi entregue e enviada
+    SENT_STATUSES = (Status.SENT, Status.DELIVERED, Status.READ)
+    DELIVERED_STATUSES = (Status.DELIVERED, Status.READ)
+
+    # Contadores da Campaign representados por cada status do item.
+    # Cumulativo: uma mensagem lida também conta como entregue e enviada.
+    STATUS_COUNTERS = {
+        Status.SENT: ('messages_sent',),
+        Status.DELIVERED: ('messages_sent', 'messages_delivered'),
+        Status.READ: ('messages_sent', 'messages_delivered', 'messages_read'),
+        Status.FAILED: ('messages_failed',),
+    }
+
     campaign = models.ForeignKey(
         Campaign,
         on_delete=models.CASCADE,
@@ -179,4 +291,55 @@ class CampaignItem(models.Model):
         indexes = [
             models.Index(fields=['campaign', 'status']),
             models.Index(fields=['message_id']),
+            # Índice parcial para o claim de lotes: só contém itens pendentes
+            models.Index(
+                fields=['campaign'],
+                condition=models.Q(status='pending'),
+                name='ci_campaign_pending_idx',
+            ),
+            # Agregações do dashboard por período de envio e status; o id incluso
+            # permite contagens COUNT(id) só pelo índice (index-only scan)
+            models.Index(fields=['sent_at', 'status'], include=['id'], name='ci_sent_at_status_idx'),
+            # Tempo médio de entrega por campanha (só itens entregues)
+            models.Index(
+                fields=['campaign', 'sent_at', 'delivered_at'],
+                condition=models.Q(sent_at__isnull=False, delivered_at__isnull=False),
+                name='ci_delivery_time_idx',
+            ),
         ]
+
+    @classmethod
+    def counter_statuses(cls):
+        """Status dos itens contados em cada contador da campanha (inverso de STATUS_COUNTERS)."""
+        counters = {}
+        for status, fields in cls.STATUS_COUNTERS.items():
+            for field in fields:
+                counters.setdefault(field, []).append(status.value)
+        return {field: tuple(statuses) for field, statuses in counters.items()}
+
+    @classmethod
+    def counter_aggregates(cls):
+        """Agregações (Count) de total_recipients e dos contadores da campanha sobre os itens."""
+        return {
+            'total_recipients': models.Count('id'),
+            **{
+                field: models.Count('id', filter=models.Q(status__in=statuses))
+                for field, statuses in cls.counter_statuses().items()
+            },
+        }
+
+    @classmethod
+    def counter_deltas(cls, old_status, new_status):
+        """Deltas dos contadores da campanha para a transição old_status -> new_status."""
+        deltas = {}
+        for field in cls.STATUS_COUNTERS.get(old_status, ()):
+            deltas[field] = deltas.get(field, 0) - 1
+        for field in cls.STATUS_COUNTERS.get(new_status, ()):
+            deltas[field] = deltas.get(field, 0) + 1
+        return {field: delta for field, delta in deltas.items() if delta}
+
+    def update_campaign_counters(self, old_status):
+        """Reflete nos contadores da campanha a mudança de status deste item."""
+        Campaign.apply_counter_deltas(
+            self.campaign_id, self.counter_deltas(old_status, self.status)
+        )
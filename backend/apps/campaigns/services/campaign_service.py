@@ -1,15 +1,25 @@
 import logging
-from django.db import transaction, models
+import uuid
+from itertools import islice
+
+from django.db import connection, transaction, models
+from django.db.models import Value
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from apps.campaigns.models import Campaign, CampaignItem
 from apps.supporters.models import Supporter, Tag
 from apps.campaigns.tasks import process_campaign_batch
+from core.utils import NON_DIGIT_RE
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Tamanho dos blocos de leitura (iterator) e gravação (bulk_create) de destinatários
+RECIPIENTS_CHUNK_SIZE = 2000
+
 class CampaignService:
     def start_campaign(self, campaign: Campaign):
         """
@@ -26,14 +36,30 @@ class CampaignService:
             if campaign.status == Campaign.Status.DRAFT:
                 self._populate_recipients(campaign)
             
+            # UPDATE condicional: só transiciona se o status não mudou desde a leitura
+            # Nova execução: cadeias de lotes anteriores (pausa -> retomada) encerram
+            now = timezone.now()
+            run_id = uuid.uuid4()
+            updated = Campaign.objects.filter(
+                pk=campaign.pk, status=campaign.status
+            ).update(
+                status=Campaign.Status.RUNNING,
+                started_at=Coalesce('started_at', Value(now)),
+                run_id=run_id,
+                updated_at=now,
+            )
+            if not updated:
+                raise ValueError("A campanha foi alterada por outra operação. Tente novamente.")
+
             campaign.status = Campaign.Status.RUNNING
-            if not campaign.started_at:
-                campaign.started_at = timezone.now()
-            campaign.save()
+            campaign.started_at = campaign.started_at or now
+            campaign.run_id = run_id
+
+        Campaign.cache_status(campaign.id, Campaign.Status.RUNNING)
 
         # Dispara a primeira task
         logger.info(f"Iniciando campanha {campaign.id} - {campaign.name}")
-        process_campaign_batch.delay(campaign.id)
+        process_campaign_batch.delay(campaign.id, str(run_id))
 
     def _populate_recipients(self, campaign: Campaign):
         """Busca supporters e usuários com base nos filtros e cria CampaignItems."""
@@ -46,7 +72,30 @@ class CampaignService:
         if not has_tags and not has_groups:
             raise ValueError("Nenhum público alvo selecionado para a campanha.")
 
-        recipients_map = {} # Map phone -> {name, supporter_obj} to deduplicate
+        # Itens gerados sob demanda e gravados em blocos de RECIPIENTS_CHUNK_SIZE:
+        # nenhuma lista com todos os destinatários chega a existir
+        items = self._recipient_items(campaign, has_tags, groups)
+        total = 0
+        while True:
+            chunk = list(islice(items, RECIPIENTS_CHUNK_SIZE))
+            if not chunk:
+                break
+            self._write_items(chunk)
+            total += len(chunk)
+
+        if not total:
+            raise ValueError("Nenhum destinatário encontrado com os filtros selecionados.")
+
+        campaign.total_recipients = total
+        campaign.save(update_fields=['total_recipients'])
+        logger.info(f"Campanha populada com {total} destinatários.")
+
+    def _recipient_items(self, campaign, has_tags, groups):
+        """
+        Gera os CampaignItems do público alvo, deduplicados por telefone.
+        Apenas os telefones normalizados ficam em memória.
+        """
+        seen_phones = set()
 
         # 1. Processar Tags e Grupos de Apoiadores/Leads (Queryset Supporter)
         qs_filter = models.Q()
@@ -57,28 +106,39 @@ class CampaignService:
 
         # Filtro por Grupos (Leads/Supporters são baseados em tags de sistema)
         if 'leads' in groups:
-            lead_tag = Tag.objects.filter(slug='lead', is_system=True).first()
-            if lead_tag:
-                qs_filter |= models.Q(tags=lead_tag)
+            lead_tag_id = Tag.get_system_tag_id('lead')
+            if lead_tag_id:
+                qs_filter |= models.Q(tags=lead_tag_id)
         
         if 'supporters' in groups:
-            supporter_tag = Tag.objects.filter(slug='apoiador', is_system=True).first()
-            if supporter_tag:
-                qs_filter |= models.Q(tags=supporter_tag)
+            supporter_tag_id = Tag.get_system_tag_id('apoiador')
+            if supporter_tag_id:
+                qs_filter |= models.Q(tags=supporter_tag_id)
 
         if qs_filter:
-            supporters = Supporter.objects.filter(
-                whatsapp_opt_in=True
-            ).exclude(phone='').filter(qs_filter).distinct()
+            # Normalização e deduplicação do telefone feitas no Postgres
+            # (DISTINCT ON), sem instanciar Supporter nem rodar regex em Python
+            supporters = Supporter.objects.annotate(
+                clean_phone=models.Func(
+                    models.F('phone'), models.Value(r'\D'), models.Value(''), models.Value('g'),
+                    function='regexp_replace',
+                    output_field=models.CharField(),
+                )
+            ).filter(
+                whatsapp_opt_in=True, clean_phone__gt=''
+            ).filter(qs_filter).order_by('clean_phone').distinct('clean_phone').values(
+                'id', 'name', 'phone', 'clean_phone'
+            )
 
-            for supporter in supporters:
-                clean_phone = self._clean_phone(supporter.phone)
-                if clean_phone:
-                    recipients_map[clean_phone] = {
-                        'name': supporter.name,
-                        'phone': supporter.phone, # Manter original ou limpo? Melhor manter original se validado
-                        'supporter': supporter
-                    }
+            for supporter in supporters.iterator(chunk_size=RECIPIENTS_CHUNK_SIZE):
+                seen_phones.add(supporter['clean_phone'])
+                yield CampaignItem(
+                    campaign=campaign,
+                    supporter_id=supporter['id'],
+                    recipient_name=supporter['name'],
+                    recipient_phone=supporter['phone'], # Manter original ou limpo? Melhor manter original se validado
+                    status=CampaignItem.Status.PENDING
+                )
 
         # 2. Processar Grupo Equipe (Users)
         if 'team' in groups:
@@ -130,7 +190,9 @@ class CampaignService:
             team_members = User.objects.filter(
                 memberships__tenant=current_client,
                 memberships__is_active=True
-            ).exclude(phone='').distinct()
+            ).exclude(phone='').only(
+                'phone', 'first_name', 'last_name', 'email'  # get_full_name
+            ).distinct()
 
             for user in team_members:
                 clean_phone = self._clean_phone(user.phone)
@@ -138,38 +200,49 @@ class CampaignService:
                     # Se já existe (ex: usuario tb é apoiador), sobrescreve ou ignora?
                     # Ignora se já estiver na lista (prioridade para dados de apoiador que tem mais meta-dados?)
                     # Ou prioriza User?
-                    if clean_phone not in recipients_map:
-                        recipients_map[clean_phone] = {
-                            'name': user.get_full_name(),
-                            'phone': user.phone,
-                            'supporter': None # Não lincamos a Supporter
-                        }
-
-        if not recipients_map:
-            raise ValueError("Nenhum destinatário encontrado com os filtros selecionados.")
+                    if clean_phone not in seen_phones:
+                        seen_phones.add(clean_phone)
+                        yield CampaignItem(
+                            campaign=campaign,
+                            supporter=None, # Não lincamos a Supporter
+                            recipient_name=user.get_full_name(),
+                            recipient_phone=user.phone,
+                            status=CampaignItem.Status.PENDING
+                        )
+
+    def _write_items(self, items):
+        """
+        Grava um bloco de CampaignItems: COPY no PostgreSQL com psycopg 3,
+        bulk_create nos demais (inclusive psycopg2, sem cursor.copy()).
+        """
+        if connection.vendor == 'postgresql' and is_psycopg3:
+            self._copy_items(items)
+        else:
+            CampaignItem.objects.bulk_create(items, batch_size=RECIPIENTS_CHUNK_SIZE)
 
-        # Bulk Create
-        items = [
-            CampaignItem(
-                campaign=campaign,
-                supporter=data['supporter'],
-                recipient_name=data['name'],
-                recipient_phone=data['phone'],
-                status=CampaignItem.Status.PENDING
-            )
-            for data in recipients_map.values()
-        ]
-        
-        CampaignItem.objects.bulk_create(items, batch_size=500)
-        
-        campaign.total_recipients = len(items)
-        campaign.save(update_fields=['total_recipients'])
-        logger.info(f"Campanha populada com {len(items)} destinatários.")
+    def _copy_items(self, items):
+        """
+        Grava CampaignItems com COPY FROM STDIN (psycopg 3), evitando o parse/plan
+        dos INSERTs multi-linha do bulk_create. Os valores passam por pre_save e
+        get_db_prep_save, como no INSERT do ORM (auto_now/auto_now_add inclusos).
+        """
+        fields = [f for f in CampaignItem._meta.concrete_fields if not f.primary_key]
+        quote_name = connection.ops.quote_name
+        sql = 'COPY {} ({}) FROM STDIN'.format(
+            quote_name(CampaignItem._meta.db_table),
+            ', '.join(quote_name(f.column) for f in fields),
+        )
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(sql) as copy:
+                for item in items:
+                    copy.write_row([
+                        f.get_db_prep_save(f.pre_save(item, add=True), connection)
+                        for f in fields
+                    ])
 
     def _clean_phone(self, phone):
         """Remove caracteres não numéricos."""
-        import re
         if not phone: return None
-        return re.sub(r'\D', '', phone)
+        return NON_DIGIT_RE.sub('', phone)
 
 campaign_service = CampaignService()
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Signals do app de campanhas.
+"""
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.tenants.models import CampaignTenantIndex
+
+from .models import Campaign
+
+
+@receiver(post_save, sender=Campaign)
+def cache_campaign_status(sender, instance, **kwargs):
+    """Mantém o status em cache alinhado com saves feitos pelo admin/API."""
+    Campaign.cache_status(instance.pk, instance.status)
+
+
+@receiver(post_save, sender=Campaign)
+def index_campaign_tenant(sender, instance, created, **kwargs):
+    """Registra em qual schema a campanha foi criada (lookup por --campaign-id)."""
+    if created:
+        CampaignTenantIndex.objects.get_or_create(
+            campaign_id=instance.pk,
+            schema_name=connection.schema_name,
+        )
+
+
+@receiver(post_delete, sender=Campaign)
+def unindex_campaign_tenant(sender, instance, **kwargs):
+    CampaignTenantIndex.objects.filter(
+        campaign_id=instance.pk,
+        schema_name=connection.schema_name,
+    ).delete()
@@ -1,8 +1,10 @@
 import logging
 import random
-import time
+from datetime import timedelta
+
 from celery import shared_task
-from django.db import connection, transaction, models
+from django.db import connection, transaction
+from django.db.models.functions import Length
 from django.utils import timezone
 from tenant_schemas_celery.task import TenantTask
 
@@ -13,187 +15,309 @@ from core.utils import apply_tenant_signature, render_template_variables
 logger = logging.getLogger(__name__)
 
 
+# Tamanho do lote
+BATCH_SIZE = 10
+
+# Fila dos envios agendados por process_campaign_batch (send_campaign_item)
+SEND_QUEUE = 'campaigns_send'
+
+# Itens QUEUED sem atualização há mais que isso, com a fila de envio livre,
+# foram perdidos (worker reiniciado) e voltam para PENDING
+QUEUED_STALE_AFTER = timedelta(minutes=10)
+
+# Marca até BATCH_SIZE itens pendentes como QUEUED e retorna seus IDs
+CLAIM_BATCH_SQL = """
+    UPDATE {table} SET status = %(queued)s, updated_at = %(now)s
+    WHERE id IN (
+        SELECT id FROM {table}
+        WHERE campaign_id = %(campaign_id)s AND status = %(pending)s
+        ORDER BY id
+        LIMIT %(limit)s
+    )
+    RETURNING id
+"""
+
+# Espera por itens em envio ou pela fila de envio: backoff exponencial limitado;
+# esgotadas as tentativas a campanha é marcada como FAILED (pode ser reiniciada)
+WAIT_MAX_RETRIES = 10
+WAIT_MAX_COUNTDOWN = 300
+
+# Back-pressure: com a fila de envio acima deste tamanho, o próximo lote
+# é adiado por BACKPRESSURE_DELAY segundos
+BACKPRESSURE_QUEUE_DEPTH = 1000
+BACKPRESSURE_DELAY = 30
+
+
+def _queue_depth(app, queue_name):
+    """
+    Quantidade de mensagens aguardando na fila do broker (0 se não for possível consultar).
+
+    No Redis a fila é uma lista e queue_declare(passive=True) não informa o
+    tamanho: lê-se LLEN. Envios agendados com countdown já foram entregues a um
+    worker (aguardam o ETA como unacked) e não entram nessa contagem.
+    """
+    try:
+        with app.connection_for_read() as conn:
+            channel = conn.default_channel
+            if conn.transport.driver_type == 'redis':
+                return channel.client.llen(queue_name)
+            return channel.queue_declare(queue=queue_name, passive=True).message_count
+    except Exception as e:
+        logger.warning("Não foi possível consultar a fila %s: %s", queue_name, e)
+        return 0
+
+
+def _send_delay_range(msg_length):
+    """Faixa (mín, máx) do intervalo aleatório entre envios, proporcional ao tamanho da mensagem."""
+    if msg_length < 100:
+        return (2, 4)
+    elif msg_length < 300:
+        return (5, 8)
+    return (10, 15)
+
+
 @shared_task(bind=True, base=TenantTask, queue='campaigns')
-def process_campaign_batch(self, campaign_id):
+def process_campaign_batch(self, campaign_id, run_id=None):
     """
-    Processa um lote de mensagens de uma campanha.
-    Executa sequencialmente com delay para respeitar rate limits.
-    Ao final, se houver mais itens, agenda o próximo lote.
+    Reserva um lote de mensagens de uma campanha e agenda um envio por item.
+    Os delays para respeitar rate limits viram `countdown` das tasks de envio,
+    sem ocupar o worker com sleep. Agenda o próximo lote após o último envio.
+
+    `run_id` identifica a execução (Campaign.run_id) que agendou a cadeia;
+    cadeias de execuções anteriores encerram sem reservar lotes.
     """
     try:
-        campaign = Campaign.objects.get(id=campaign_id)
+        # Só o tamanho da mensagem é usado aqui: calculado no banco, sem trazer o texto
+        campaign = Campaign.objects.only('id', 'name', 'status', 'run_id').annotate(
+            message_length=Length('message')
+        ).get(id=campaign_id)
     except Campaign.DoesNotExist:
-        logger.error(f"Campanha {campaign_id} não encontrada.")
+        logger.error("Campanha %s não encontrada.", campaign_id)
         return
 
     if campaign.status != Campaign.Status.RUNNING:
-        logger.info(f"Campanha {campaign_id} parada ou finalizada. Status: {campaign.status}")
+        logger.info("Campanha %s parada ou finalizada. Status: %s", campaign_id, campaign.status)
         return
 
-    # Tamanho do lote
-    BATCH_SIZE = 10
+    # Cadeia de uma execução anterior (ainda agendada quando a campanha foi
+    # pausada e retomada): a execução atual tem sua própria cadeia
+    current_run_id = str(campaign.run_id) if campaign.run_id else None
+    if run_id != current_run_id:
+        logger.info("Cadeia de lotes obsoleta da campanha %s encerrada.", campaign_id)
+        return
 
     # Busca itens pendentes
-    # select_for_update com skip_locked garante que se tivermos multiplos workers,
-    # eles não peguem os mesmos itens (embora a ideia seja serializar por campanha)
+    # Um advisory lock por campanha (em vez de lock em cada linha) serializa a
+    # reserva de lotes entre workers; é liberado ao fim da transação.
+    # O schema entra na chave pois os IDs de campanha são por tenant.
+    # Um único timestamp por execução (reserva, corte de itens perdidos e transições)
+    now = timezone.now()
     with transaction.atomic():
-        items = list(
-            CampaignItem.objects.filter(
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_try_advisory_xact_lock(hashtext(%s), %s)',
+                [connection.schema_name, campaign.id]
+            )
+            if not cursor.fetchone()[0]:
+                logger.info("Outro worker já está reservando o lote da campanha %s.", campaign_id)
+                return
+
+            # Reserva o lote (PENDING -> QUEUED) e obtém os IDs em um único UPDATE
+            cursor.execute(CLAIM_BATCH_SQL.format(table=CampaignItem._meta.db_table), {
+                'queued': CampaignItem.Status.QUEUED.value,
+                'pending': CampaignItem.Status.PENDING.value,
+                'now': now,
+                'campaign_id': campaign.id,
+                'limit': BATCH_SIZE,
+            })
+            item_ids = [row[0] for row in cursor.fetchall()]
+
+    if not item_ids:
+        # Fila de envio congestionada: os itens QUEUED estão só atrasados, não
+        # perdidos; espera sem corte de itens parados
+        backlogged = _queue_depth(self.app, SEND_QUEUE) > BACKPRESSURE_QUEUE_DEPTH
+
+        if not backlogged:
+            # Itens QUEUED parados com a fila livre se perderam: voltam para PENDING
+            # e são reservados de novo no próximo lote (um envio atrasado que chegue
+            # depois não os encontra mais como QUEUED e é descartado)
+            recovered = CampaignItem.objects.filter(
                 campaign=campaign,
-                status=CampaignItem.Status.PENDING
-            ).select_for_update(skip_locked=True)[:BATCH_SIZE]
-        )
+                status=CampaignItem.Status.QUEUED,
+                updated_at__lt=now - QUEUED_STALE_AFTER
+            ).update(status=CampaignItem.Status.PENDING, updated_at=now)
+            if recovered:
+                logger.warning("%s itens perdidos da campanha %s voltaram para a fila", recovered, campaign_id)
+                process_campaign_batch.apply_async(args=[campaign_id, run_id], countdown=2)
+                return
 
-        # Marca como QUEUED para evitar que outra task pegue
-        for item in items:
-            item.status = CampaignItem.Status.QUEUED
-            item.save(update_fields=['status'])
-
-    if not items:
-        # Nenhum item pendente encontrado.
-        # Verifica se ainda existem itens pendentes totais (talvez bloqueados)
-        pending_count = CampaignItem.objects.filter(
-            campaign=campaign,
-            status=CampaignItem.Status.PENDING
-        ).count()
-
-        if pending_count == 0:
-            # Campanha concluída — usa update() para não sobrescrever contadores F()
-            Campaign.objects.filter(pk=campaign.id).update(
-                status=Campaign.Status.COMPLETED,
-                completed_at=timezone.now()
-            )
-            logger.info(f"Campanha {campaign.name} concluída!")
-        else:
-            # Ainda há itens pendentes (possivelmente bloqueados), agenda próxima tentativa
-            logger.info(f"Ainda há {pending_count} itens pendentes, aguardando...")
-            process_campaign_batch.apply_async(args=[campaign_id], countdown=5)
-        return
+            # Ainda há itens em envio? exists() para em LIMIT 1
+            has_in_flight = CampaignItem.objects.filter(
+                campaign=campaign,
+                status__in=(CampaignItem.Status.PENDING, CampaignItem.Status.QUEUED)
+            ).exists()
 
-    logger.info(f"Processando lote de {len(items)} mensagens para campanha {campaign.name}")
-
-    # Processa o lote
-    for item in items:
-        # Verifica se campanha foi pausada durante o processamento do lote
-        campaign.refresh_from_db()
-        if campaign.status != Campaign.Status.RUNNING:
-            break
-
-        try:
-            # 1. Calcular Delay
-            msg_length = len(campaign.message)
-            if msg_length < 100:
-                delay = random.uniform(2, 4)
-            elif msg_length < 300:
-                delay = random.uniform(5, 8)
-            else:
-                delay = random.uniform(10, 15)
-
-            logger.info(f"Aguardando {delay:.2f}s para enviar mensagem...")
-            time.sleep(delay)
-
-            # 2. Preparar contexto e renderizar mensagem
-            raw_name = item.recipient_name or ''
-            name_parts = raw_name.split()
-            context = {
-                'name': ' '.join(p.capitalize() for p in name_parts),
-                'first_name': name_parts[0].capitalize() if name_parts else '',
-                'last_name': ' '.join(p.capitalize() for p in name_parts[1:]) if len(name_parts) > 1 else '',
-            }
-
-            # Adicionar informações adicionais do supporter se disponível
-            if item.supporter:
-                context.update({
-                    'city': item.supporter.city or '',
-                    'neighborhood': item.supporter.neighborhood or '',
-                    'state': item.supporter.state or '',
-                })
-
-            # Renderizar mensagem com variáveis
-            final_message = render_template_variables(campaign.message, context)
-
-            # Aplicar assinatura global do tenant
-            tenant = self.get_tenant_for_schema(connection.schema_name)
-            final_message = apply_tenant_signature(tenant, final_message, context)
-
-            # 3. Enviar Mensagem (com ou sem mídia)
-            if campaign.media_url:
-                media_type = campaign.media_type or 'image'
-                logger.info(f"📸 Enviando mídia - URL: {campaign.media_url}, Tipo: {media_type}")
-                response = whatsapp_service.send_media_sync(
-                    instance_name=campaign.whatsapp_session.instance_name,
-                    phone=item.recipient_phone,
-                    media_url=campaign.media_url,
-                    media_type=media_type,
-                    caption=final_message,
-                    api_key=campaign.whatsapp_session.access_token
-                )
-            else:
-                response = whatsapp_service.send_text_sync(
-                    instance_name=campaign.whatsapp_session.instance_name,
-                    phone=item.recipient_phone,
-                    text=final_message,
-                    api_key=campaign.whatsapp_session.access_token
+            if not has_in_flight:
+                # Campanha concluída — update() grava só estas colunas: não sobrescreve
+                # contadores F() nem reescreve message/media_url. updated_at explícito
+                # pois update() não aplica auto_now
+                Campaign.objects.filter(pk=campaign.id).update(
+                    status=Campaign.Status.COMPLETED,
+                    completed_at=now,
+                    updated_at=now
                 )
+                Campaign.cache_status(campaign.id, Campaign.Status.COMPLETED)
+                logger.info("Campanha %s concluída!", campaign.name)
+                return
 
-            # 4. Atualizar Item
-            item.status = CampaignItem.Status.SENT
-            item.sent_at = timezone.now()
-
-            # Extrai ID da mensagem da resposta da Evolution API
-            # A resposta contém key.id que é o ID do WhatsApp (necessário para match com webhooks)
-            logger.info(f"📦 Resposta da API para {item.recipient_phone}: {response}")
-            logger.info(f"📋 Tipo da resposta: {type(response)}")
-            message_id = None
-
-            if isinstance(response, dict):
-                # Extrai key.id que é o ID real da mensagem no WhatsApp
-                # Este ID será enviado nos webhooks messages.update como key.id
-                if 'key' in response and isinstance(response['key'], dict):
-                    message_id = response['key'].get('id', '')
-
-                # Log para debug
-                if 'key' in response:
-                    logger.info(f"📋 key.id extraído: {message_id}")
-
-            if message_id:
-                item.message_id = message_id
-                logger.info(f"✅ message_id (key.id) salvo: {message_id}")
-            else:
-                logger.warning(f"⚠️  Não foi possível extrair key.id da resposta. Response: {response}")
-
-            item.save()
-
-            # 5. Atualizar Métricas da Campanha
-            Campaign.objects.filter(pk=campaign.id).update(
-                messages_sent=models.F('messages_sent') + 1
+        # Fila congestionada ou itens em envio: nova verificação com backoff, limitada
+        reason = 'fila de envio congestionada' if backlogged else 'itens em envio sem conclusão'
+        retries = self.request.retries
+        if retries >= WAIT_MAX_RETRIES:
+            logger.error(
+                "Campanha %s sem progresso após %s verificações (%s). Marcando como falha.",
+                campaign_id, retries, reason
             )
+            failed = Campaign.objects.filter(pk=campaign.id, status=Campaign.Status.RUNNING).update(
+                status=Campaign.Status.FAILED,
+                updated_at=now
+            )
+            if failed:
+                Campaign.cache_status(campaign.id, Campaign.Status.FAILED)
+            return
+
+        countdown = min(5 * 2 ** retries, WAIT_MAX_COUNTDOWN)
+        if backlogged:
+            countdown = max(countdown, BACKPRESSURE_DELAY)
+        logger.info(
+            "Ainda há itens pendentes/em envio na campanha %s (%s), nova verificação em %ss...",
+            campaign_id, reason, countdown
+        )
+        raise self.retry(countdown=countdown, max_retries=WAIT_MAX_RETRIES)
+
+    logger.info("Agendando lote de %s mensagens para campanha %s", len(item_ids), campaign.name)
+
+    # Cada envio é agendado após o anterior, com o mesmo espaçamento aleatório
+    delay_range = _send_delay_range(campaign.message_length)
+    countdown = 0
+    for item_id in item_ids:
+        countdown += random.uniform(*delay_range)
+        send_campaign_item.apply_async(args=[item_id], countdown=countdown)
+
+    # Próximo lote logo após o último envio deste (mais tarde se a fila estiver cheia)
+    next_countdown = countdown + 2
+    if _queue_depth(self.app, SEND_QUEUE) > BACKPRESSURE_QUEUE_DEPTH:
+        next_countdown += BACKPRESSURE_DELAY
+    process_campaign_batch.apply_async(args=[campaign_id, run_id], countdown=next_countdown)
+
 
-            logger.info(f"Mensagem enviada para {item.recipient_name} ({item.recipient_phone})")
+# Fila própria: os envios agendados (countdown) não disputam com a reserva de lotes
+@shared_task(bind=True, base=TenantTask, queue=SEND_QUEUE)
+def send_campaign_item(self, item_id):
+    """Envia a mensagem de um item de campanha reservado (QUEUED) por process_campaign_batch."""
+    try:
+        # Item, campanha, sessão e supporter em uma única query, só com os campos usados
+        item = CampaignItem.objects.select_related(
+            'campaign__whatsapp_session', 'supporter'
+        ).only(
+            'id', 'campaign_id', 'supporter_id', 'recipient_name', 'recipient_phone',
+            'status', 'message_id', 'error_message', 'sent_at', 'updated_at',
+            'campaign__id', 'campaign__message', 'campaign__media_url', 'campaign__media_type',
+            'campaign__whatsapp_session__id',
+            'campaign__whatsapp_session__instance_name',
+            'campaign__whatsapp_session__access_token',
+            'supporter__id', 'supporter__city', 'supporter__neighborhood', 'supporter__state',
+        ).get(id=item_id, status=CampaignItem.Status.QUEUED)
+    except CampaignItem.DoesNotExist:
+        logger.warning("Item de campanha %s não encontrado ou já processado.", item_id)
+        return
+
+    campaign = item.campaign
+
+    # Campanha pausada/cancelada depois do agendamento: devolve o item à fila
+    # (status publicado no cache pelas transições; banco só na falta)
+    if Campaign.get_cached_status(campaign.id) != Campaign.Status.RUNNING:
+        CampaignItem.objects.filter(
+            pk=item.pk, status=CampaignItem.Status.QUEUED
+        ).update(status=CampaignItem.Status.PENDING, updated_at=timezone.now())
+        return
+
+    try:
+        # 2. Preparar contexto e renderizar mensagem
+        raw_name = item.recipient_name or ''
+        name_parts = raw_name.split()
+        context = {
+            'name': ' '.join(p.capitalize() for p in name_parts),
+            'first_name': name_parts[0].capitalize() if name_parts else '',
+            'last_name': ' '.join(p.capitalize() for p in name_parts[1:]) if len(name_parts) > 1 else '',
+        }
 
-        except Exception as e:
-            logger.error(f"Erro ao enviar item {item.id}: {str(e)}")
-            item.status = CampaignItem.Status.FAILED
-            item.error_message = str(e)
-            item.save()
+        # Adicionar informações adicionais do supporter se disponível
+        if item.supporter:
+            context.update({
+                'city': item.supporter.city or '',
+                'neighborhood': item.supporter.neighborhood or '',
+                'state': item.supporter.state or '',
+            })
 
-            Campaign.objects.filter(pk=campaign.id).update(
-                messages_failed=models.F('messages_failed') + 1
+        # Renderizar mensagem com variáveis
+        final_message = render_template_variables(campaign.message, context)
+
+        # Aplicar assinatura global do tenant
+        tenant = self.get_tenant_for_schema(connection.schema_name)
+        final_message = apply_tenant_signature(tenant, final_message, context)
+
+        # 3. Enviar Mensagem (com ou sem mídia)
+        if campaign.media_url:
+            media_type = campaign.media_type or 'image'
+            logger.debug("Enviando mídia - URL: %s, Tipo: %s", campaign.media_url, media_type)
+            response = whatsapp_service.send_media_sync(
+                instance_name=campaign.whatsapp_session.instance_name,
+                phone=item.recipient_phone,
+                media_url=campaign.media_url,
+                media_type=media_type,
+                caption=final_message,
+                api_key=campaign.whatsapp_session.access_token
+            )
+        else:
+            response = whatsapp_service.send_text_sync(
+                instance_name=campaign.whatsapp_session.instance_name,
+                phone=item.recipient_phone,
+                text=final_message,
+                api_key=campaign.whatsapp_session.access_token
             )
 
-    # Verifica se ainda há itens pendentes antes de agendar próximo lote
-    remaining_count = CampaignItem.objects.filter(
-        campaign=campaign,
-        status=CampaignItem.Status.PENDING
-    ).count()
-
-    if remaining_count > 0:
-        logger.info(f"Restam {remaining_count} itens. Agendando próximo lote...")
-        process_campaign_batch.apply_async(args=[campaign_id], countdown=2)
-    else:
-        logger.info(f"Todos os itens foram processados. Finalizando campanha {campaign.name}.")
-        # Usa update() para não sobrescrever contadores atualizados via F()
-        Campaign.objects.filter(pk=campaign.id).update(
-            status=Campaign.Status.COMPLETED,
-            completed_at=timezone.now()
-        )
+        # 4. Atualizar Item
+        item.status = CampaignItem.Status.SENT
+        item.sent_at = timezone.now()
+
+        # Extrai ID da mensagem da resposta da Evolution API
+        # A resposta contém key.id que é o ID do WhatsApp (necessário para match com webhooks)
+        # Dumps da resposta só em DEBUG (formatação lazy: nada é montado se desabilitado)
+        logger.debug("Resposta da API para %s: %r", item.recipient_phone, response)
+        message_id = None
+
+        if isinstance(response, dict):
+            # Extrai key.id que é o ID real da mensagem no WhatsApp
+            # Este ID será enviado nos webhooks messages.update como key.id
+            if 'key' in response and isinstance(response['key'], dict):
+                message_id = response['key'].get('id', '')
+
+        if message_id:
+            item.message_id = message_id
+            logger.debug("message_id (key.id) salvo: %s", message_id)
+        else:
+            logger.warning("Não foi possível extrair key.id da resposta. Response: %r", response)
+
+        item.save(update_fields=['status', 'sent_at', 'message_id', 'updated_at'])
+
+        logger.info("Mensagem enviada para %s (%s)", item.recipient_name, item.recipient_phone)
+
+    except Exception as e:
+        logger.error("Erro ao enviar item %s: %s", item.id, e)
+        item.status = CampaignItem.Status.FAILED
+        item.error_message = str(e)
+        item.save(update_fields=['status', 'error_message', 'updated_at'])
+
+    # Atualiza as métricas da campanha (QUEUED -> SENT/FAILED)
+    item.update_campaign_counters(CampaignItem.Status.QUEUED)
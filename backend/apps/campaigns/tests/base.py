@@ -0,0 +1,55 @@
+"""
+Base para testes com schema de tenant (django-tenants).
+"""
+import uuid
+
+from django_tenants.test.cases import TenantTestCase
+
+from apps.campaigns.models import Campaign, CampaignItem
+from apps.tenants.models import Plan
+from apps.whatsapp.models import WhatsAppSession
+
+
+class CampaignTenantTestCase(TenantTestCase):
+    """TenantTestCase com plano, sessão WhatsApp e fábricas de campanhas/itens."""
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Tenant de Teste'
+        tenant.slug = 'tenant-de-teste'
+        tenant.plan, _ = Plan.objects.get_or_create(
+            slug='test',
+            defaults={
+                'name': 'Teste',
+                'max_supporters': 1000,
+                'max_messages_month': 1000,
+                'max_campaigns': 10,
+                'max_whatsapp_sessions': 1,
+                'price': 0,
+            },
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.session = WhatsAppSession.objects.create(
+            name='Sessão de Teste',
+            instance_name=f'test-{uuid.uuid4().hex[:8]}',
+            status=WhatsAppSession.Status.CONNECTED,
+        )
+
+    def create_campaign(self, **kwargs):
+        kwargs.setdefault('name', 'Campanha de Teste')
+        kwargs.setdefault('message', 'Olá {{first_name}}!')
+        kwargs.setdefault('whatsapp_session', self.session)
+        return Campaign.objects.create(**kwargs)
+
+    def create_items(self, campaign, count, status=CampaignItem.Status.PENDING):
+        return CampaignItem.objects.bulk_create([
+            CampaignItem(
+                campaign=campaign,
+                recipient_name=f'Apoiador {index}',
+                recipient_phone=f'55119{index:08d}',
+                status=status,
+            )
+            for index in range(count)
+        ])
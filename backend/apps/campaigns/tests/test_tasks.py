@@ -0,0 +1,184 @@
+"""
+Testes do fluxo de envio de campanhas: reserva/agendamento de lotes,
+pausa/retomada e contadores da campanha.
+"""
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from apps.campaigns import tasks
+from apps.campaigns.models import Campaign, CampaignItem
+from apps.campaigns.services.campaign_service import campaign_service
+from apps.campaigns.tests.base import CampaignTenantTestCase
+
+Status = CampaignItem.Status
+
+
+@mock.patch.object(tasks, '_queue_depth', return_value=0)
+@mock.patch.object(tasks.process_campaign_batch, 'apply_async')
+@mock.patch.object(tasks.send_campaign_item, 'apply_async')
+class ProcessCampaignBatchTests(CampaignTenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.run_id = uuid.uuid4()
+        self.campaign = self.create_campaign(status=Campaign.Status.RUNNING, run_id=self.run_id)
+
+    def test_claims_one_batch_and_schedules_sends(self, send_async, batch_async, _depth):
+        self.create_items(self.campaign, tasks.BATCH_SIZE + 2)
+
+        tasks.process_campaign_batch.run(self.campaign.id, str(self.run_id))
+
+        statuses = list(self.campaign.items.order_by('id').values_list('status', flat=True))
+        self.assertEqual(statuses[:tasks.BATCH_SIZE], [Status.QUEUED] * tasks.BATCH_SIZE)
+        self.assertEqual(statuses[tasks.BATCH_SIZE:], [Status.PENDING] * 2)
+
+        # Um envio por item reservado, espaçados em ordem crescente
+        self.assertEqual(send_async.call_count, tasks.BATCH_SIZE)
+        countdowns = [call.kwargs['countdown'] for call in send_async.call_args_list]
+        self.assertEqual(countdowns, sorted(countdowns))
+
+        # Próximo lote da mesma execução, depois do último envio
+        batch_async.assert_called_once()
+        self.assertEqual(batch_async.call_args.kwargs['args'], [self.campaign.id, str(self.run_id)])
+        self.assertGreater(batch_async.call_args.kwargs['countdown'], countdowns[-1])
+
+    def test_stale_run_exits_without_claiming(self, send_async, batch_async, _depth):
+        self.create_items(self.campaign, 3)
+
+        tasks.process_campaign_batch.run(self.campaign.id, str(uuid.uuid4()))
+
+        self.assertFalse(self.campaign.items.exclude(status=Status.PENDING).exists())
+        send_async.assert_not_called()
+        batch_async.assert_not_called()
+
+    def test_paused_campaign_is_not_claimed(self, send_async, batch_async, _depth):
+        Campaign.objects.filter(pk=self.campaign.pk).update(status=Campaign.Status.PAUSED)
+        self.create_items(self.campaign, 3)
+
+        tasks.process_campaign_batch.run(self.campaign.id, str(self.run_id))
+
+        self.assertFalse(self.campaign.items.exclude(status=Status.PENDING).exists())
+        send_async.assert_not_called()
+        batch_async.assert_not_called()
+
+    def test_completes_when_nothing_is_left(self, send_async, batch_async, _depth):
+        self.create_items(self.campaign, 2, status=Status.SENT)
+
+        tasks.process_campaign_batch.run(self.campaign.id, str(self.run_id))
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, Campaign.Status.COMPLETED)
+        self.assertIsNotNone(self.campaign.completed_at)
+        self.assertEqual(Campaign.get_cached_status(self.campaign.id), Campaign.Status.COMPLETED)
+
+
+class ResumeCampaignTests(CampaignTenantTestCase):
+
+    @mock.patch('apps.campaigns.services.campaign_service.process_campaign_batch')
+    def test_resume_starts_a_new_run(self, process_campaign_batch):
+        old_run_id = uuid.uuid4()
+        campaign = self.create_campaign(status=Campaign.Status.PAUSED, run_id=old_run_id)
+
+        campaign_service.start_campaign(campaign)
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, Campaign.Status.RUNNING)
+        self.assertNotEqual(campaign.run_id, old_run_id)
+        process_campaign_batch.delay.assert_called_once_with(campaign.id, str(campaign.run_id))
+
+
+@mock.patch.object(tasks, 'whatsapp_service')
+class SendCampaignItemTests(CampaignTenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.campaign = self.create_campaign(status=Campaign.Status.RUNNING)
+        [self.item] = self.create_items(self.campaign, 1, status=Status.QUEUED)
+
+    def test_paused_campaign_returns_item_to_pending(self, whatsapp_service):
+        Campaign.cache_status(self.campaign.id, Campaign.Status.PAUSED)
+
+        tasks.send_campaign_item.run(self.item.id)
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.status, Status.PENDING)
+        whatsapp_service.send_text_sync.assert_not_called()
+
+    def test_sent_item_updates_counters(self, whatsapp_service):
+        Campaign.cache_status(self.campaign.id, Campaign.Status.RUNNING)
+        whatsapp_service.send_text_sync.return_value = {'key': {'id': 'WAMID-1'}}
+
+        tasks.send_campaign_item.run(self.item.id)
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.status, Status.SENT)
+        self.assertEqual(self.item.message_id, 'WAMID-1')
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.messages_sent, 1)
+        self.assertEqual(self.campaign.messages_failed, 0)
+
+    def test_api_error_marks_item_failed(self, whatsapp_service):
+        Campaign.cache_status(self.campaign.id, Campaign.Status.RUNNING)
+        whatsapp_service.send_text_sync.side_effect = RuntimeError('timeout')
+
+        tasks.send_campaign_item.run(self.item.id)
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.status, Status.FAILED)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.messages_sent, 0)
+        self.assertEqual(self.campaign.messages_failed, 1)
+
+
+class CounterDeltaTests(SimpleTestCase):
+
+    def test_transitions_are_cumulative(self):
+        cases = [
+            (Status.QUEUED, Status.SENT, {'messages_sent': 1}),
+            (Status.QUEUED, Status.FAILED, {'messages_failed': 1}),
+            (Status.SENT, Status.DELIVERED, {'messages_delivered': 1}),
+            (Status.SENT, Status.READ, {'messages_delivered': 1, 'messages_read': 1}),
+            (Status.DELIVERED, Status.READ, {'messages_read': 1}),
+            (Status.READ, Status.READ, {}),
+            (Status.SENT, Status.FAILED, {'messages_sent': -1, 'messages_failed': 1}),
+        ]
+        for old_status, new_status, expected in cases:
+            with self.subTest(old=old_status, new=new_status):
+                self.assertEqual(CampaignItem.counter_deltas(old_status, new_status), expected)
+
+
+class CampaignCounterTests(CampaignTenantTestCase):
+
+    def test_status_updates_apply_counter_deltas(self):
+        campaign = self.create_campaign(status=Campaign.Status.RUNNING)
+        [item] = self.create_items(campaign, 1, status=Status.QUEUED)
+
+        for old_status, new_status in [
+            (Status.QUEUED, Status.SENT),
+            (Status.SENT, Status.DELIVERED),
+            (Status.DELIVERED, Status.READ),
+        ]:
+            item.status = new_status
+            item.update_campaign_counters(old_status)
+
+        campaign.refresh_from_db()
+        self.assertEqual(
+            (campaign.messages_sent, campaign.messages_delivered, campaign.messages_read),
+            (1, 1, 1)
+        )
+
+    def test_recalculate_counters_matches_item_status(self):
+        campaign = self.create_campaign(status=Campaign.Status.COMPLETED, messages_delivered=7)
+        for status, count in [(Status.SENT, 2), (Status.DELIVERED, 3), (Status.READ, 4), (Status.FAILED, 1)]:
+            self.create_items(campaign, count, status=status)
+
+        self.assertEqual(Campaign.recalculate_counters(), 1)
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.total_recipients, 10)
+        self.assertEqual(campaign.messages_sent, 9)
+        self.assertEqual(campaign.messages_delivered, 7)
+        self.assertEqual(campaign.messages_read, 4)
+        self.assertEqual(campaign.messages_failed, 1)
@@ -8,12 +8,16 @@ Este comando cria:
 Uso:
     python manage.py seed_database              # Cria tudo
     python manage.py seed_database --dry-run     # Simula
+    python manage.py seed_database --workers 8   # Tenants em paralelo
 """
 
+import os
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connection, transaction
 from django_tenants.utils import schema_context
 
 from apps.tenants.models import Client, Domain, Plan
@@ -21,6 +25,50 @@ from apps.supporters.models import Tag
 
 logger = logging.getLogger(__name__)
 
+# Tenants lidos por bloco em _create_system_tags
+TENANTS_CHUNK_SIZE = 500
+
+
+def _tenant_chunks(chunk_size=TENANTS_CHUNK_SIZE):
+    """
+    Gera blocos de (name, schema_name) paginados por pk (keyset).
+    Cada bloco é uma query curta: nenhum cursor fica aberto enquanto os
+    tenants do bloco são processados (inclusive na conexão do comando).
+    """
+    last_pk = 0
+    while True:
+        chunk = list(
+            Client.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', 'name', 'schema_name'
+            )[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_pk = chunk[-1][0]
+        yield [(name, schema_name) for _, name, schema_name in chunk]
+
+
+def _seed_tags_for_schema(schema_name, tags_data, dry_run=False):
+    """
+    Cria as tags do sistema que faltam em um tenant.
+    Retorna a lista de (tag_data, criada).
+    """
+    with schema_context(schema_name):
+        # Uma consulta para as existentes e um único INSERT por tenant
+        existing_slugs = set(
+            Tag.objects.filter(
+                slug__in=[tag_data['slug'] for tag_data in tags_data], is_system=True
+            ).values_list('slug', flat=True)
+        )
+        results = [
+            (tag_data, tag_data['slug'] not in existing_slugs) for tag_data in tags_data
+        ]
+
+        new_tags = [Tag(**tag_data) for tag_data, created in results if created]
+        if new_tags and not dry_run:
+            Tag.objects.bulk_create(new_tags, ignore_conflicts=True)
+        return results
+
 
 class Command(BaseCommand):
     help = 'Popula banco de dados com planos e tags do sistema'
@@ -31,6 +79,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Simula a execução sem salvar alterações',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=int(os.environ.get('SEED_WORKERS', 8)),
+            help='Tenants processados em paralelo (padrão: SEED_WORKERS ou 8)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options.get('dry_run', False)
@@ -51,7 +105,7 @@ class Command(BaseCommand):
         self._create_public_tenant(dry_run)
 
         # Passo 3: Criar tags do sistema para todos os tenants
-        self._create_system_tags(dry_run)
+        self._create_system_tags(dry_run, workers=options['workers'])
 
         self.stdout.write('')
         self.stdout.write('='*80)
@@ -66,16 +120,17 @@ class Command(BaseCommand):
         """Cria o tenant public e domínio localhost para o schema público."""
         self.stdout.write('\n🌐 Configurando tenant public...')
 
-        if Client.objects.filter(schema_name='public').exists():
+        # Tenant lido uma vez e reaproveitado na criação do domínio
+        public_tenant = Client.objects.only('id').filter(schema_name='public').first()
+        if public_tenant is not None:
             self.stdout.write('   ⏭️  Tenant public já existe')
         else:
             if not dry_run:
-                plan = Plan.objects.first()
-                Client.objects.create(
+                public_tenant = Client.objects.create(
                     schema_name='public',
                     name='VoxPop Platform',
                     slug='public',
-                    plan=plan,
+                    plan=Plan.objects.only('id').first(),
                     is_active=True,
                 )
             self.stdout.write('   ✅ Tenant public criado')
@@ -84,7 +139,6 @@ class Command(BaseCommand):
             self.stdout.write('   ⏭️  Domínio localhost já existe')
         else:
             if not dry_run:
-                public_tenant = Client.objects.get(schema_name='public')
                 Domain.objects.create(
                     domain='localhost',
                     tenant=public_tenant,
@@ -132,28 +186,36 @@ class Command(BaseCommand):
             },
         ]
 
-        created_count = 0
+        # Uma consulta para os existentes e um único INSERT para os que faltam
+        existing_slugs = set(
+            Plan.objects.filter(
+                slug__in=[plan_data['slug'] for plan_data in plans_data]
+            ).values_list('slug', flat=True)
+        )
+
+        new_plans = []
         for plan_data in plans_data:
             slug = plan_data['slug']
-            if Plan.objects.filter(slug=slug).exists():
+            if slug in existing_slugs:
                 self.stdout.write(f'   ⏭️  Plano "{slug}" já existe')
             else:
-                if not dry_run:
-                    Plan.objects.create(**plan_data)
+                new_plans.append(Plan(**plan_data))
                 self.stdout.write(f'   ✅ Plano "{slug}" criado')
-                created_count += 1
+
+        if new_plans and not dry_run:
+            Plan.objects.bulk_create(new_plans, ignore_conflicts=True)
+        created_count = len(new_plans)
 
         if created_count > 0:
             self.stdout.write(f'   {created_count} planos criados')
         else:
             self.stdout.write('   Nenhum plano criado (já existiam)')
 
-    def _create_system_tags(self, dry_run=False):
+    def _create_system_tags(self, dry_run=False, workers=1):
         """Cria tags do sistema para todos os tenants."""
         self.stdout.write('\n🏷️ Criando tags do sistema...')
 
-        tenants = Client.objects.all()
-        tenant_count = tenants.count()
+        tenant_count = Client.objects.count()
 
         if tenant_count == 0:
             self.stdout.write(self.style.WARNING('   ⚠️  Nenhum tenant encontrado - crie tenants primeiro'))
@@ -188,21 +250,45 @@ class Command(BaseCommand):
             },
         ]
 
-        total_created = 0
+        def seed(schema_name):
+            return _seed_tags_for_schema(schema_name, tags_data, dry_run)
 
-        for tenant in tenants:
-            self.stdout.write(f'\n   Tenant: {tenant.name} (schema: {tenant.schema_name})')
+        def seed_in_thread(schema_name):
+            try:
+                return seed(schema_name)
+            finally:
+                # Cada thread abre sua própria conexão; libera ao terminar
+                connection.close()
 
-            with schema_context(tenant.schema_name):
-                for tag_data in tags_data:
-                    slug = tag_data['slug']
-                    if Tag.objects.filter(slug=slug, is_system=True).exists():
-                        self.stdout.write(f'      ⏭️  Tag "{slug}" já existe')
-                    else:
-                        if not dry_run:
-                            Tag.objects.create(**tag_data)
-                        self.stdout.write(f'      ✅ Tag "{tag_data["name"]}" criada')
-                        total_created += 1
+        # Só um bloco de tenants em memória por vez
+        total_created = 0
+        if dry_run or workers <= 1:
+            # Dry-run sempre serial, na conexão do comando
+            for tenants in _tenant_chunks():
+                schema_names = [schema_name for _, schema_name in tenants]
+                total_created += self._report_system_tags(tenants, map(seed, schema_names))
+        else:
+            # Tenants isolados e limitados por I/O: um por thread (conexões
+            # próprias); a saída é escrita aqui, na ordem dos tenants
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for tenants in _tenant_chunks():
+                    schema_names = [schema_name for _, schema_name in tenants]
+                    total_created += self._report_system_tags(
+                        tenants, executor.map(seed_in_thread, schema_names)
+                    )
 
         if total_created > 0:
-            self.stdout.write(f'\n   {total_created} tags criadas no total')
\ No newline at end of file
+            self.stdout.write(f'\n   {total_created} tags criadas no total')
+
+    def _report_system_tags(self, tenants, results):
+        """Escreve o resultado de cada tenant e retorna o total de tags criadas."""
+        total_created = 0
+        for (name, schema_name), tag_results in zip(tenants, results, strict=True):
+            self.stdout.write(f'\n   Tenant: {name} (schema: {schema_name})')
+            for tag_data, created in tag_results:
+                if created:
+                    self.stdout.write(f'      ✅ Tag "{tag_data["name"]}" criada')
+                    total_created += 1
+                else:
+                    self.stdout.write(f'      ⏭️  Tag "{tag_data["slug"]}" já existe')
+        return total_created
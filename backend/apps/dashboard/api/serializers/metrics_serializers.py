@@ -1,9 +1,20 @@
 """
 Serializers for Dashboard metrics.
 """
+from datetime import date, timedelta
+from decimal import Decimal
+
 from rest_framework import serializers
 
 from apps.dashboard.models import DailyMetrics
+from apps.dashboard.models.metrics import RATE_SCALE
+
+# Default and maximum ranges for metrics queries
+_DEFAULT_RANGE = timedelta(days=7)
+_MAX_RANGE = timedelta(days=90)
+
+# Two decimal places, as the former DecimalField(max_digits=5, decimal_places=2)
+_RATE_PLACES = Decimal('0.01')
 
 
 class OverviewSerializer(serializers.Serializer):
@@ -20,6 +31,10 @@ class OverviewSerializer(serializers.Serializer):
 
 class DailyMetricsSerializer(serializers.ModelSerializer):
     """Serializer for daily metrics."""
+    # Rates are stored in basis points; exposed as percentage strings ("95.50"),
+    # the same representation the former DecimalField serialized to
+    delivery_rate = serializers.SerializerMethodField()
+    read_rate = serializers.SerializerMethodField()
 
     class Meta:
         model = DailyMetrics
@@ -30,6 +45,16 @@ class DailyMetricsSerializer(serializers.ModelSerializer):
             'campaigns_created', 'campaigns_completed'
         ]
 
+    @staticmethod
+    def _percentage(basis_points) -> str:
+        return str((Decimal(basis_points) / RATE_SCALE).quantize(_RATE_PLACES))
+
+    def get_delivery_rate(self, obj) -> str:
+        return self._percentage(obj.delivery_rate)
+
+    def get_read_rate(self, obj) -> str:
+        return self._percentage(obj.read_rate)
+
 
 class MetricsQuerySerializer(serializers.Serializer):
     """Serializer for validating metrics query params."""
@@ -38,14 +63,14 @@ class MetricsQuerySerializer(serializers.Serializer):
 
     def validate(self, attrs):
         """Validate date range."""
-        from datetime import timedelta, date
+        today = date.today()
 
         # Se não foi fornecido, usar últimos 7 dias
         if 'start' not in attrs or attrs['start'] is None:
-            attrs['start'] = date.today() - timedelta(days=7)
+            attrs['start'] = today - _DEFAULT_RANGE
 
         if 'end' not in attrs or attrs['end'] is None:
-            attrs['end'] = date.today()
+            attrs['end'] = today
 
         if attrs['start'] > attrs['end']:
             raise serializers.ValidationError({
@@ -53,7 +78,7 @@ class MetricsQuerySerializer(serializers.Serializer):
             })
 
         # Limit range to 90 days
-        if (attrs['end'] - attrs['start']).days > 90:
+        if attrs['end'] - attrs['start'] > _MAX_RANGE:
             raise serializers.ValidationError({
                 'end': 'O período máximo é de 90 dias.'
             })
@@ -1,21 +1,55 @@
 """
 ViewSet for Dashboard metrics.
 """
+import hashlib
+import json
 from datetime import date, timedelta
 
-from django.db.models import Sum, Count
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, TruncDate
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.timesince import timesince
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from apps.dashboard.api.serializers import MetricsQuerySerializer
+from apps.dashboard.models import DailyMetrics
 from apps.supporters.models import Supporter
 from apps.campaigns.models import Campaign, CampaignItem
 from apps.whatsapp.models import WhatsAppSession
 from core.permissions import IsTenantMember
 
+# Filtros por status, montados uma vez e reaproveitados pelas agregações
+Q_SENT = Q(status__in=CampaignItem.SENT_STATUSES)
+Q_DELIVERED = Q(status__in=CampaignItem.DELIVERED_STATUSES)
+Q_READ = Q(status=CampaignItem.Status.READ)
+Q_FAILED = Q(status=CampaignItem.Status.FAILED)
+Q_ACTIVE_CAMPAIGN = Q(status__in=(Campaign.Status.RUNNING, Campaign.Status.SCHEDULED))
+Q_CONNECTED_SESSION = Q(status=WhatsAppSession.Status.CONNECTED)
+
+# Validade (s) da visão geral em cache e no cliente (Cache-Control)
+OVERVIEW_CACHE_TIMEOUT = 30
+
+# Limite de atividades por requisição (padrão e máximo)
+ACTIVITIES_DEFAULT_LIMIT = 5
+ACTIVITIES_MAX_LIMIT = 50
+
+
+def _overview_etag(request, *args, **kwargs):
+    """ETag da visão geral do tenant, derivado do conteúdo (em cache) da resposta."""
+    data = DashboardViewSet.get_overview_data(request)
+    digest = hashlib.blake2b(
+        json.dumps(data, sort_keys=True).encode(), digest_size=8
+    ).hexdigest()
+    return f'overview-{connection.schema_name}-{digest}'
+
 
 class DashboardViewSet(viewsets.ViewSet):
     """
@@ -26,91 +60,93 @@ class DashboardViewSet(viewsets.ViewSet):
     """
     permission_classes = [IsAuthenticated, IsTenantMember]
 
+    @method_decorator(cache_control(private=True, max_age=OVERVIEW_CACHE_TIMEOUT))
+    @method_decorator(etag(_overview_etag))
     def list(self, request):
         """
         Get dashboard overview cards.
         GET /api/v1/dashboard/
         """
+        return Response(self.get_overview_data(request))
+
+    @staticmethod
+    def get_overview_data(request):
+        """
+        Visão geral do tenant, reaproveitada por OVERVIEW_CACHE_TIMEOUT segundos
+        (o mesmo dict serve o ETag e o corpo da resposta).
+        """
+        data = getattr(request, '_dashboard_overview', None)
+        if data is None:
+            # IDs e dados são por schema: o schema faz parte da chave
+            cache_key = f'dashboard:{connection.schema_name}:overview'
+            data = cache.get(cache_key)
+            if data is None:
+                data = DashboardViewSet._build_overview()
+                cache.set(cache_key, data, timeout=OVERVIEW_CACHE_TIMEOUT)
+            request._dashboard_overview = data
+        return data
+
+    @staticmethod
+    def _build_overview():
+        """Calcula os cards da visão geral."""
         today = timezone.now().date()
         month_start = today.replace(day=1)
 
         # Supporters stats (soft-deleted are automatically excluded by manager)
         total_supporters = Supporter.objects.count()
-        new_supporters_today = Supporter.objects.filter(
-            created_at__date=today
-        ).count()
 
         # Messages stats - usar CampaignItem que é a fonte de verdade
-        messages_sent_month = CampaignItem.objects.filter(
-            sent_at__date__gte=month_start,
-            status__in=[CampaignItem.Status.SENT, CampaignItem.Status.DELIVERED, CampaignItem.Status.READ]
-        ).count()
-
-        messages_sent_today = CampaignItem.objects.filter(
-            sent_at__date=today,
-            status__in=[CampaignItem.Status.SENT, CampaignItem.Status.DELIVERED, CampaignItem.Status.READ]
-        ).count()
+        # Itens do mês lidos uma única vez, com contagens condicionais
+        month_stats = CampaignItem.objects.filter(
+            sent_at__date__gte=month_start
+        ).aggregate(
+            total_sent=Count('id', filter=Q_SENT),
+            delivered=Count('id', filter=Q_DELIVERED),
+            read=Count('id', filter=Q_READ),
+        )
+        messages_sent_month = total_sent = month_stats['total_sent']
 
         # Calculate delivery and read rates from this month
-        month_items = CampaignItem.objects.filter(sent_at__date__gte=month_start)
-        total_sent = month_items.filter(
-            status__in=[CampaignItem.Status.SENT, CampaignItem.Status.DELIVERED, CampaignItem.Status.READ]
-        ).count()
-
         if total_sent > 0:
-            delivered = month_items.filter(
-                status__in=[CampaignItem.Status.DELIVERED, CampaignItem.Status.READ]
-            ).count()
-            read = month_items.filter(status=CampaignItem.Status.READ).count()
-            delivery_rate = (delivered / total_sent) * 100
-            read_rate = (read / total_sent) * 100
+            delivery_rate = (month_stats['delivered'] / total_sent) * 100
+            read_rate = (month_stats['read'] / total_sent) * 100
         else:
             delivery_rate = 0.0
             read_rate = 0.0
 
-        # Total messages from campaign counters
-        total_messages_delivered = Campaign.objects.aggregate(
-            total=Sum('messages_delivered')
-        )['total'] or 0
-        total_messages_read = Campaign.objects.aggregate(
-            total=Sum('messages_read')
-        )['total'] or 0
-        total_messages_failed = Campaign.objects.aggregate(
-            total=Sum('messages_failed')
-        )['total'] or 0
-
-        # Total campaigns
-        total_campaigns = Campaign.objects.count()
-
-        # Active campaigns (soft-deleted are automatically excluded by manager)
-        active_campaigns = Campaign.objects.filter(
-            status__in=[Campaign.Status.RUNNING, Campaign.Status.SCHEDULED]
-        ).count()
+        # Contadores das campanhas, total e ativas em uma consulta
+        # (soft-deleted are automatically excluded by manager)
+        campaign_stats = Campaign.objects.aggregate(
+            delivered=Sum('messages_delivered'),
+            read=Sum('messages_read'),
+            failed=Sum('messages_failed'),
+            total=Count('id'),
+            active=Count('id', filter=Q_ACTIVE_CAMPAIGN),
+        )
 
         # WhatsApp sessions
-        total_sessions = WhatsAppSession.objects.filter(is_active=True).count()
-        connected_sessions = WhatsAppSession.objects.filter(
-            is_active=True,
-            status=WhatsAppSession.Status.CONNECTED
-        ).count()
+        session_stats = WhatsAppSession.objects.filter(is_active=True).aggregate(
+            total=Count('id'),
+            connected=Count('id', filter=Q_CONNECTED_SESSION),
+        )
 
         data = {
             'total_supporters': total_supporters,
-            'total_campaigns': total_campaigns,
-            'active_campaigns': active_campaigns,
+            'total_campaigns': campaign_stats['total'],
+            'active_campaigns': campaign_stats['active'],
             'messages_sent': messages_sent_month,  # Usar messages_sent para compatibilidade com frontend
-            'messages_delivered': total_messages_delivered,
-            'messages_read': total_messages_read,
-            'messages_failed': total_messages_failed,
+            'messages_delivered': campaign_stats['delivered'] or 0,
+            'messages_read': campaign_stats['read'] or 0,
+            'messages_failed': campaign_stats['failed'] or 0,
             'delivery_rate': round(delivery_rate, 1),
             'read_rate': round(read_rate, 1),
             'whatsapp_sessions': {
-                'connected': connected_sessions,
-                'total': total_sessions
+                'connected': session_stats['connected'],
+                'total': session_stats['total']
             }
         }
 
-        return Response(data)
+        return data
 
     @action(detail=False, methods=['get'])
     def metrics(self, request):
@@ -124,42 +160,46 @@ class DashboardViewSet(viewsets.ViewSet):
         start_date = serializer.validated_data['start']
         end_date = serializer.validated_data['end']
 
-        # Calcular métricas em tempo real para cada dia no período
-        from datetime import timedelta
-        import collections
-
-        metrics_data = []
-        current_date = start_date
-
-        while current_date <= end_date:
-            next_date = current_date + timedelta(days=1)
-
-            # Contar mensagens do dia usando CampaignItem
-            items_day = CampaignItem.objects.filter(
-                sent_at__date=current_date
-            )
-
-            sent = items_day.filter(
-                status__in=[CampaignItem.Status.SENT, CampaignItem.Status.DELIVERED, CampaignItem.Status.READ]
-            ).count()
-
-            delivered = items_day.filter(
-                status__in=[CampaignItem.Status.DELIVERED, CampaignItem.Status.READ]
-            ).count()
-
-            read = items_day.filter(status=CampaignItem.Status.READ).count()
-
-            failed = items_day.filter(status=CampaignItem.Status.FAILED).count()
-
-            metrics_data.append({
-                'date': current_date.isoformat(),
-                'sent': sent,
-                'delivered': delivered,
-                'read': read,
-                'failed': failed,
-            })
+        # Dias fechados vêm de DailyMetrics (materializado por
+        # calculate_daily_metrics_task); hoje e dias ainda não calculados são
+        # contados ao vivo em CampaignItem, em uma única consulta
+        today = timezone.localdate()
+        counts_by_day = {
+            row['date']: {
+                'sent': row['messages_sent'],
+                'delivered': row['messages_delivered'],
+                'read': row['messages_read'],
+                'failed': row['messages_failed'],
+            }
+            for row in DailyMetrics.objects.filter(
+                date__range=(start_date, min(end_date, today - timedelta(days=1)))
+            ).values('date', 'messages_sent', 'messages_delivered', 'messages_read', 'messages_failed')
+        }
 
-            current_date = next_date
+        days = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        live_days = [day for day in days if day not in counts_by_day]
+        if live_days:
+            daily_counts = CampaignItem.objects.filter(
+                sent_at__date__in=live_days
+            ).annotate(
+                day=TruncDate('sent_at')
+            ).values('day').annotate(
+                sent=Count('id', filter=Q_SENT),
+                delivered=Count('id', filter=Q_DELIVERED),
+                read=Count('id', filter=Q_READ),
+                failed=Count('id', filter=Q_FAILED),
+            ).order_by('day')
+            counts_by_day.update((row.pop('day'), row) for row in daily_counts)
+
+        # Dias sem envios entram zerados
+        empty_counts = {'sent': 0, 'delivered': 0, 'read': 0, 'failed': 0}
+        metrics_data = [
+            {'date': day.isoformat(), **counts_by_day.get(day, empty_counts)}
+            for day in days
+        ]
 
         return Response(metrics_data)
 
@@ -172,27 +212,29 @@ class DashboardViewSet(viewsets.ViewSet):
         # Get campaigns from last 30 days with engagement
         thirty_days_ago = timezone.now() - timedelta(days=30)
 
-        campaigns = Campaign.objects.filter(
+        # Taxa de leitura calculada no banco; linhas como dicts (values), já
+        # com as chaves da resposta, sem instanciar Campaign
+        data = list(Campaign.objects.filter(
             started_at__gte=thirty_days_ago
         ).exclude(
             total_recipients=0
-        ).order_by('-messages_read')[:5]
-
-        data = []
-        for campaign in campaigns:
-            read_rate = 0.0
-            if campaign.total_recipients > 0:
-                read_rate = round((campaign.messages_read / campaign.total_recipients) * 100, 1)
-
-            data.append({
-                'id': campaign.id,
-                'name': campaign.name,
-                'total_recipients': campaign.total_recipients,
-                'sent': campaign.messages_sent,
-                'delivered': campaign.messages_delivered,
-                'read': campaign.messages_read,
-                'read_rate': read_rate
-            })
+        ).order_by('-messages_read').values(
+            'id', 'name', 'total_recipients',
+            sent=F('messages_sent'),
+            delivered=F('messages_delivered'),
+            read=F('messages_read'),
+            read_rate=Case(
+                When(
+                    total_recipients__gt=0,
+                    then=Cast('messages_read', FloatField()) * 100 / F('total_recipients'),
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        )[:5])
+
+        for row in data:
+            row['read_rate'] = round(row['read_rate'], 1)
 
         return Response(data)
 
@@ -202,27 +244,28 @@ class DashboardViewSet(viewsets.ViewSet):
         Get message status distribution.
         GET /api/v1/dashboard/message_status/
         """
-        # Get stats from CampaignItem (fonte de verdade)
-        stats = CampaignItem.objects.values('status').annotate(
-            count=Count('id')
+        # Contadores denormalizados das campanhas (mantidos a cada mudança de
+        # status por CampaignItem.update_campaign_counters): soma por campanha,
+        # sem GROUP BY sobre todos os itens
+        totals = Campaign.objects.aggregate(
+            recipients=Sum('total_recipients'),
+            sent=Sum('messages_sent'),
+            delivered=Sum('messages_delivered'),
+            read=Sum('messages_read'),
+            failed=Sum('messages_failed'),
         )
+        totals = {key: value or 0 for key, value in totals.items()}
 
-        # Convert to dict
+        # Contadores são cumulativos (lida também conta como entregue e enviada);
+        # a distribuição usa o status atual de cada item
         status_map = {
-            'sent': 0,
-            'delivered': 0,
-            'read': 0,
-            'failed': 0,
-            'pending': 0
+            'sent': max(totals['sent'] - totals['delivered'], 0),
+            'delivered': max(totals['delivered'] - totals['read'], 0),
+            'read': totals['read'],
+            'failed': totals['failed'],
+            'pending': max(totals['recipients'] - totals['sent'] - totals['failed'], 0),
         }
 
-        for stat in stats:
-            status = stat['status']
-            if status in status_map:
-                status_map[status] = stat['count']
-            elif status in ['queued', 'pending']:
-                status_map['pending'] += stat['count']
-
         return Response(status_map)
 
     @action(detail=False, methods=['get'], url_path='activities')
@@ -231,26 +274,30 @@ class DashboardViewSet(viewsets.ViewSet):
         Get recent activities.
         GET /api/v1/dashboard/activities/?limit=5
         """
-        limit = int(request.query_params.get('limit', 5))
+        try:
+            limit = int(request.query_params.get('limit', ACTIVITIES_DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = ACTIVITIES_DEFAULT_LIMIT
+        limit = max(1, min(limit, ACTIVITIES_MAX_LIMIT))
 
         # Get recent campaigns as activities
         recent_campaigns = Campaign.objects.filter(
             started_at__isnull=False
-        ).order_by('-started_at')[:limit]
+        ).order_by('-started_at').values('id', 'name', 'started_at', 'status')[:limit]
 
-        activities = []
-        for campaign in recent_campaigns:
-            activities.append({
-                'id': campaign.id,
+        activities = [
+            {
+                'id': campaign['id'],
                 'type': 'campaign',
-                'title': f"Campanha '{campaign.name}' foi iniciada",
-                'time': self._format_time_ago(campaign.started_at),
-                'status': campaign.status if campaign.status != 'completed' else None
-            })
+                'title': f"Campanha '{campaign['name']}' foi iniciada",
+                'time': self._format_time_ago(campaign['started_at']),
+                'status': campaign['status'] if campaign['status'] != 'completed' else None
+            }
+            for campaign in recent_campaigns
+        ]
 
         return Response(activities)
 
     def _format_time_ago(self, dt):
         """Format datetime as 'X time ago' string."""
-        from django.utils.timesince import timesince
         return f"{timesince(dt)} atrás"
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.db.models import F
+
+# Taxas passam de % com 2 casas decimais para pontos-base (10000 = 100%)
+RATE_FIELDS = {
+    'DailyMetrics': ('delivery_rate', 'read_rate'),
+    'CampaignMetrics': ('delivery_rate', 'read_rate', 'failure_rate'),
+}
+RATE_HELP_TEXT = 'Em centésimos de ponto percentual (10000 = 100%)'
+RATE_VERBOSE_NAMES = {
+    'delivery_rate': 'Taxa de Entrega (%)',
+    'read_rate': 'Taxa de Leitura (%)',
+    'failure_rate': 'Taxa de Falha (%)',
+}
+
+
+def _update_rates(apps, expression):
+    for model_name, fields in RATE_FIELDS.items():
+        model = apps.get_model('dashboard', model_name)
+        model.objects.update(**{field: expression(F(field)) for field in fields})
+
+
+def to_basis_points(apps, schema_editor):
+    _update_rates(apps, lambda rate: rate * 100)
+
+
+def to_percent(apps, schema_editor):
+    _update_rates(apps, lambda rate: rate / 100)
+
+
+def _alter_rates(field_factory):
+    return [
+        migrations.AlterField(
+            model_name=model_name.lower(),
+            name=field,
+            field=field_factory(field),
+        )
+        for model_name, fields in RATE_FIELDS.items()
+        for field in fields
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        # 1. Amplia a precisão para caber os valores multiplicados por 100
+        *_alter_rates(lambda field: models.DecimalField(
+            decimal_places=2, default=0, max_digits=7, verbose_name=RATE_VERBOSE_NAMES[field]
+        )),
+        # 2. Converte % em pontos-base
+        migrations.RunPython(to_basis_points, to_percent),
+        # 3. Inteiro pequeno (o cast de numeric arredonda; valores já são inteiros)
+        *_alter_rates(lambda field: models.PositiveSmallIntegerField(
+            default=0, help_text=RATE_HELP_TEXT, verbose_name=RATE_VERBOSE_NAMES[field]
+        )),
+    ]
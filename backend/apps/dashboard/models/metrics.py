@@ -2,9 +2,22 @@
 Metrics models for dashboard analytics.
 """
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Cast, Round
 
 from core.models import BaseModel
 
+# Taxas gravadas em pontos-base (centésimos de %): 10000 = 100%
+RATE_SCALE = 100
+RATE_HELP_TEXT = 'Em centésimos de ponto percentual (10000 = 100%)'
+
+
+def _rate(part, total):
+    """Taxa part/total em pontos-base, ou 0 quando total é zero."""
+    if total > 0:
+        return round(part * 100 * RATE_SCALE / total)
+    return 0
+
 
 class DailyMetrics(BaseModel):
     """
@@ -56,17 +69,15 @@ class DailyMetrics(BaseModel):
     )
 
     # Taxas calculadas
-    delivery_rate = models.DecimalField(
-        max_digits=5,
-        decimal_places=2,
+    delivery_rate = models.PositiveSmallIntegerField(
         default=0,
-        verbose_name='Taxa de Entrega (%)'
+        verbose_name='Taxa de Entrega (%)',
+        help_text=RATE_HELP_TEXT
     )
-    read_rate = models.DecimalField(
-        max_digits=5,
-        decimal_places=2,
+    read_rate = models.PositiveSmallIntegerField(
         default=0,
-        verbose_name='Taxa de Leitura (%)'
+        verbose_name='Taxa de Leitura (%)',
+        help_text=RATE_HELP_TEXT
     )
 
     class Meta:
@@ -77,25 +88,28 @@ class DailyMetrics(BaseModel):
     def __str__(self):
         return f"Métricas de {self.date}"
 
-    def calculate_rates(self) -> None:
-        """Calcula as taxas de entrega e leitura."""
-        if self.messages_sent > 0:
-            self.delivery_rate = round(
-                (self.messages_delivered / self.messages_sent) * 100, 2
-            )
-        else:
-            self.delivery_rate = 0
-
-        if self.messages_delivered > 0:
-            self.read_rate = round(
-                (self.messages_read / self.messages_delivered) * 100, 2
-            )
-        else:
-            self.read_rate = 0
-
-    def save(self, *args, **kwargs):
-        self.calculate_rates()
-        super().save(*args, **kwargs)
+    @staticmethod
+    def _rate_expression(part, total):
+        """ROUND(part * 10000.0 / total) em pontos-base, ou 0 quando total é zero."""
+        return Case(
+            When(**{f'{total}__gt': 0}, then=Round(
+                Cast(part, models.DecimalField(max_digits=12, decimal_places=2))
+                * (100 * RATE_SCALE) / F(total)
+            )),
+            default=Value(0),
+            output_field=models.PositiveSmallIntegerField(),
+        )
+
+    @classmethod
+    def update_rates(cls, **filters) -> int:
+        """
+        Recalcula as taxas de entrega e leitura no banco, em um único UPDATE
+        (também consistente após atualizações em massa dos contadores).
+        """
+        return cls.objects.filter(**filters).update(
+            delivery_rate=cls._rate_expression('messages_delivered', 'messages_sent'),
+            read_rate=cls._rate_expression('messages_read', 'messages_delivered'),
+        )
 
 
 class CampaignMetrics(BaseModel):
@@ -134,23 +148,20 @@ class CampaignMetrics(BaseModel):
     )
 
     # Taxas
-    delivery_rate = models.DecimalField(
-        max_digits=5,
-        decimal_places=2,
+    delivery_rate = models.PositiveSmallIntegerField(
         default=0,
-        verbose_name='Taxa de Entrega (%)'
+        verbose_name='Taxa de Entrega (%)',
+        help_text=RATE_HELP_TEXT
     )
-    read_rate = models.DecimalField(
-        max_digits=5,
-        decimal_places=2,
+    read_rate = models.PositiveSmallIntegerField(
         default=0,
-        verbose_name='Taxa de Leitura (%)'
+        verbose_name='Taxa de Leitura (%)',
+        help_text=RATE_HELP_TEXT
     )
-    failure_rate = models.DecimalField(
-        max_digits=5,
-        decimal_places=2,
+    failure_rate = models.PositiveSmallIntegerField(
         default=0,
-        verbose_name='Taxa de Falha (%)'
+        verbose_name='Taxa de Falha (%)',
+        help_text=RATE_HELP_TEXT
     )
 
     # Tempo médio
@@ -184,38 +195,31 @@ class CampaignMetrics(BaseModel):
         self.save()
 
     def calculate_rates(self) -> None:
-        """Calcula as taxas."""
-        if self.sent > 0:
-            self.delivery_rate = round((self.delivered / self.sent) * 100, 2)
-        else:
-            self.delivery_rate = 0
-
-        if self.delivered > 0:
-            self.read_rate = round((self.read / self.delivered) * 100, 2)
-        else:
-            self.read_rate = 0
-
-        if self.total_recipients > 0:
-            self.failure_rate = round((self.failed / self.total_recipients) * 100, 2)
-        else:
-            self.failure_rate = 0
+        """Calcula as taxas (em pontos-base)."""
+        self.delivery_rate = _rate(self.delivered, self.sent)
+        self.read_rate = _rate(self.read, self.delivered)
+        self.failure_rate = _rate(self.failed, self.total_recipients)
 
     def calculate_avg_delivery_time(self) -> None:
         """Calcula o tempo médio de entrega."""
-        from django.db.models import Avg, F
-        from apps.campaigns.models import CampaignRecipient
-
-        avg_time = CampaignRecipient.objects.filter(
-            campaign=self.campaign,
+        from django.db.models import Avg, DurationField, ExpressionWrapper, F
+        from django.db.models.functions import Extract
+        from apps.campaigns.models import CampaignItem
+
+        # EXTRACT(EPOCH FROM delivered_at - sent_at): o banco devolve a média
+        # em segundos, sem converter INTERVAL em timedelta
+        avg_seconds = CampaignItem.objects.filter(
+            campaign_id=self.campaign_id,
             sent_at__isnull=False,
             delivered_at__isnull=False
-        ).annotate(
-            delivery_time=F('delivered_at') - F('sent_at')
         ).aggregate(
-            avg_delivery=Avg('delivery_time')
+            avg_delivery=Avg(Extract(
+                ExpressionWrapper(F('delivered_at') - F('sent_at'), output_field=DurationField()),
+                'epoch'
+            ))
         )['avg_delivery']
 
-        if avg_time:
-            self.avg_delivery_time_seconds = int(avg_time.total_seconds())
+        if avg_seconds is not None:
+            self.avg_delivery_time_seconds = int(avg_seconds)
         else:
             self.avg_delivery_time_seconds = None
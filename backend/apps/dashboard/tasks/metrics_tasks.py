@@ -4,13 +4,25 @@ Celery tasks for dashboard metrics calculation.
 import logging
 from datetime import date, timedelta
 
-from celery import shared_task
+from celery import group, shared_task
 from django.db.models import Count, Q
 from django.utils import timezone
 from tenant_schemas_celery.task import TenantTask
 
+from apps.campaigns.models import CampaignItem
+
 logger = logging.getLogger(__name__)
 
+# Filtros por status, montados uma vez e reaproveitados a cada execução
+Q_SENT = Q(status__in=CampaignItem.SENT_STATUSES)
+Q_DELIVERED = Q(status__in=CampaignItem.DELIVERED_STATUSES)
+Q_READ = Q(status=CampaignItem.Status.READ)
+Q_FAILED = Q(status=CampaignItem.Status.FAILED)
+
+# Dias fechados recalculados a cada execução: entregas e leituras que chegam
+# depois (webhooks atrasados) entram nas métricas dos dias anteriores
+METRICS_REFRESH_DAYS = 7
+
 
 @shared_task(bind=True, base=TenantTask, queue='analytics')
 def calculate_daily_metrics_task(self, date_str: str) -> None:
@@ -22,7 +34,6 @@ def calculate_daily_metrics_task(self, date_str: str) -> None:
     """
     from apps.dashboard.models import DailyMetrics
     from apps.supporters.models import Supporter
-    from apps.messaging.models import Message
     from apps.campaigns.models import Campaign
 
     target_date = date.fromisoformat(date_str)
@@ -35,68 +46,68 @@ def calculate_daily_metrics_task(self, date_str: str) -> None:
     )
     day_end = day_start + timedelta(days=1)
 
-    # Novos apoiadores
-    new_supporters = Supporter.objects.filter(
-        created_at__gte=day_start,
-        created_at__lt=day_end
-    ).count()
-
-    # Total de apoiadores até o fim do dia
-    total_supporters = Supporter.objects.filter(
-        created_at__lt=day_end
-    ).count()
-
-    # Mensagens do dia
-    messages_qs = Message.objects.filter(
-        created_at__gte=day_start,
+    # Novos apoiadores e total até o fim do dia em uma única consulta
+    supporter_counts = Supporter.objects.filter(
         created_at__lt=day_end
+    ).aggregate(
+        total=Count('id'),
+        new=Count('id', filter=Q(created_at__gte=day_start)),
     )
-
-    messages_sent = messages_qs.filter(
-        status__in=[Message.Status.SENT, Message.Status.DELIVERED, Message.Status.READ]
-    ).count()
-
-    messages_delivered = messages_qs.filter(
-        status__in=[Message.Status.DELIVERED, Message.Status.READ]
-    ).count()
-
-    messages_read = messages_qs.filter(
-        status=Message.Status.READ
-    ).count()
-
-    messages_failed = messages_qs.filter(
-        status=Message.Status.FAILED
-    ).count()
-
-    # Campanhas
-    campaigns_created = Campaign.objects.filter(
-        created_at__gte=day_start,
-        created_at__lt=day_end
-    ).count()
-
-    campaigns_completed = Campaign.objects.filter(
+    new_supporters = supporter_counts['new']
+    total_supporters = supporter_counts['total']
+
+    # Mensagens do dia: mesma fonte de verdade do dashboard (CampaignItem,
+    # pelo horário de envio), contagens condicionais em uma única consulta
+    message_counts = CampaignItem.objects.filter(
+        sent_at__gte=day_start,
+        sent_at__lt=day_end
+    ).aggregate(
+        sent=Count('id', filter=Q_SENT),
+        delivered=Count('id', filter=Q_DELIVERED),
+        read=Count('id', filter=Q_READ),
+        failed=Count('id', filter=Q_FAILED),
+    )
+    messages_sent = message_counts['sent']
+    messages_delivered = message_counts['delivered']
+    messages_read = message_counts['read']
+    messages_failed = message_counts['failed']
+
+    # Campanhas criadas e concluídas no dia em uma única consulta
+    created_today = Q(created_at__gte=day_start, created_at__lt=day_end)
+    completed_today = Q(
         completed_at__gte=day_start,
         completed_at__lt=day_end,
         status=Campaign.Status.COMPLETED
-    ).count()
-
-    # Atualiza ou cria métricas do dia
-    metrics, created = DailyMetrics.objects.update_or_create(
-        date=target_date,
-        defaults={
-            'new_supporters': new_supporters,
-            'total_supporters': total_supporters,
-            'messages_sent': messages_sent,
-            'messages_delivered': messages_delivered,
-            'messages_read': messages_read,
-            'messages_failed': messages_failed,
-            'campaigns_created': campaigns_created,
-            'campaigns_completed': campaigns_completed,
-        }
+    )
+    campaign_counts = Campaign.objects.filter(created_today | completed_today).aggregate(
+        created=Count('id', filter=created_today),
+        completed=Count('id', filter=completed_today),
+    )
+    campaigns_created = campaign_counts['created']
+    campaigns_completed = campaign_counts['completed']
+
+    # Atualiza ou cria métricas do dia em um único INSERT ... ON CONFLICT (date)
+    counters = {
+        'new_supporters': new_supporters,
+        'total_supporters': total_supporters,
+        'messages_sent': messages_sent,
+        'messages_delivered': messages_delivered,
+        'messages_read': messages_read,
+        'messages_failed': messages_failed,
+        'campaigns_created': campaigns_created,
+        'campaigns_completed': campaigns_completed,
+    }
+    DailyMetrics.objects.bulk_create(
+        [DailyMetrics(date=target_date, **counters)],
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=[*counters, 'updated_at'],
     )
 
-    action = "criadas" if created else "atualizadas"
-    logger.info(f"Métricas {action} para {target_date}")
+    # Taxas calculadas no banco a partir dos contadores gravados acima
+    DailyMetrics.update_rates(date=target_date)
+
+    logger.info(f"Métricas gravadas para {target_date}")
 
 
 @shared_task(bind=True, base=TenantTask, queue='analytics')
@@ -131,20 +142,37 @@ def update_campaign_metrics(self, campaign_id: int) -> None:
 def calculate_all_tenants_daily_metrics() -> None:
     """
     Calcula métricas diárias para todos os tenants.
-    Deve ser executada via Celery Beat às 00:05.
+    Executada via Celery Beat a cada hora (minuto 5); recalcula os últimos
+    METRICS_REFRESH_DAYS dias fechados (até ontem).
     """
-    from django_tenants.utils import tenant_context
     from apps.tenants.models import Client
 
-    yesterday = (timezone.now() - timedelta(days=1)).date().isoformat()
+    yesterday = (timezone.now() - timedelta(days=1)).date()
+    dates = [
+        (yesterday - timedelta(days=offset)).isoformat()
+        for offset in range(METRICS_REFRESH_DAYS)
+    ]
+
+    # Uma publicação (group) para todos os tenants; o schema de cada task vai
+    # explícito no header lido pelo TenantTask (o public não tem as tabelas)
+    # Só o schema de cada tenant, lido em blocos (cursor no servidor)
+    schema_names = Client.objects.filter(is_active=True).exclude(
+        schema_name='public'
+    ).values_list('schema_name', flat=True).iterator(chunk_size=100)
+    signatures = [
+        calculate_daily_metrics_task.s(date_str).set(headers={'_schema_name': schema_name})
+        for schema_name in schema_names
+        for date_str in dates
+    ]
+    if not signatures:
+        return
 
-    for tenant in Client.objects.filter(is_active=True):
-        try:
-            with tenant_context(tenant):
-                calculate_daily_metrics_task.delay(yesterday)
-            logger.info(f"Métricas enfileiradas para tenant {tenant.name}")
-        except Exception as e:
-            logger.exception(f"Erro ao enfileirar métricas para {tenant.name}: {e}")
+    result = group(signatures).apply_async()
+
+    logger.info(
+        "Métricas de %s dias enfileiradas (%s tasks, group %s)",
+        len(dates), len(signatures), result.id
+    )
 
 
 @shared_task(bind=True, base=TenantTask, queue='analytics')
@@ -159,9 +187,12 @@ def recalculate_metrics_range(self, start_date: str, end_date: str) -> None:
     start = date.fromisoformat(start_date)
     end = date.fromisoformat(end_date)
 
-    current = start
-    while current <= end:
-        calculate_daily_metrics_task.delay(current.isoformat())
-        current += timedelta(days=1)
+    # Uma publicação (group) para todo o período, no schema atual
+    result = group(
+        calculate_daily_metrics_task.s((start + timedelta(days=offset)).isoformat())
+        for offset in range((end - start).days + 1)
+    ).apply_async()
 
-    logger.info(f"Recálculo enfileirado para período {start_date} a {end_date}")
+    logger.info(
+        "Recálculo enfileirado para período %s a %s (group %s)", start_date, end_date, result.id
+    )
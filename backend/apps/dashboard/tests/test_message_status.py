@@ -0,0 +1,63 @@
+"""
+Testes da distribuição de status de mensagens do dashboard
+(contadores cumulativos das campanhas).
+"""
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory
+
+from apps.campaigns.models import Campaign, CampaignItem
+from apps.campaigns.tests.base import CampaignTenantTestCase
+from apps.dashboard.api.views import DashboardViewSet
+
+Status = CampaignItem.Status
+
+
+class MessageStatusTests(CampaignTenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        fixtures = [
+            {Status.PENDING: 3, Status.QUEUED: 2, Status.SENT: 4, Status.DELIVERED: 2, Status.READ: 5},
+            {Status.SENT: 1, Status.READ: 1, Status.FAILED: 3},
+        ]
+        for index, counts in enumerate(fixtures):
+            campaign = self.create_campaign(name=f'Campanha {index}', status=Campaign.Status.RUNNING)
+            for status, count in counts.items():
+                self.create_items(campaign, count, status=status)
+        # Contadores a partir dos itens, como mantidos pelo envio/webhooks
+        Campaign.recalculate_counters()
+
+    def get_message_status(self):
+        request = APIRequestFactory().get('/api/v1/dashboard/message_status/')
+        return DashboardViewSet().message_status(request).data
+
+    def test_distribution_by_current_item_status(self):
+        self.assertEqual(self.get_message_status(), {
+            'sent': 5,
+            'delivered': 2,
+            'read': 6,
+            'failed': 3,
+            'pending': 5,  # pending + queued
+        })
+
+    def test_matches_item_status_counts(self):
+        counts = dict(
+            CampaignItem.objects.values_list('status').annotate(total=Count('id')).order_by()
+        )
+        data = self.get_message_status()
+
+        for status in (Status.SENT, Status.DELIVERED, Status.READ, Status.FAILED):
+            self.assertEqual(data[status], counts.get(status, 0))
+        self.assertEqual(data['pending'], counts.get(Status.PENDING, 0) + counts.get(Status.QUEUED, 0))
+
+    def test_ignores_deleted_campaigns(self):
+        expected = self.get_message_status()
+
+        deleted = self.create_campaign(
+            name='Campanha excluída', status=Campaign.Status.COMPLETED,
+            total_recipients=4, messages_sent=4, messages_delivered=4, messages_read=4,
+        )
+        self.create_items(deleted, 4, status=Status.READ)
+        deleted.delete()
+
+        self.assertEqual(self.get_message_status(), expected)
@@ -9,7 +9,10 @@ from apps.messaging.models import MessageTemplate
 class MessageTemplateSerializer(serializers.ModelSerializer):
     """Full serializer for message template detail view."""
     has_media = serializers.BooleanField(read_only=True)
-    created_by_name = serializers.SerializerMethodField()
+    # Lido do created_by já carregado (select_related no viewset; instância no duplicate)
+    created_by_name = serializers.CharField(
+        source='created_by.get_full_name', read_only=True, default=None
+    )
 
     class Meta:
         model = MessageTemplate
@@ -22,11 +25,6 @@ class MessageTemplateSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at', 'variables']
 
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return obj.created_by.get_full_name()
-        return None
-
 
 class MessageTemplateListSerializer(serializers.ModelSerializer):
     """Simplified serializer for template list view."""
@@ -66,24 +64,21 @@ class MessageTemplateCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Create template and extract variables."""
         validated_data['created_by'] = self.context['request'].user
-        template = super().create(validated_data)
 
-        # Auto-extract variables from content
-        template.extract_variables()
-        template.save(update_fields=['variables'])
+        # Auto-extract variables from content (gravadas no mesmo INSERT)
+        validated_data['variables'] = MessageTemplate.variables_in(validated_data.get('content'))
 
-        return template
+        return super().create(validated_data)
 
     def update(self, instance, validated_data):
         """Update template and re-extract variables if content changed."""
-        instance = super().update(instance, validated_data)
-
-        # Re-extract variables if content was updated
+        # Re-extract variables if content was updated (no mesmo UPDATE, só se mudaram)
         if 'content' in validated_data:
-            instance.extract_variables()
-            instance.save(update_fields=['variables'])
+            variables = MessageTemplate.variables_in(validated_data['content'])
+            if variables != (instance.variables or []):
+                validated_data['variables'] = variables
 
-        return instance
+        return super().update(instance, validated_data)
 
 
 class TemplatePreviewSerializer(serializers.Serializer):
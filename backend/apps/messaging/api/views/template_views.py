@@ -34,7 +34,11 @@ class MessageTemplateViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Get active templates (soft-deleted are automatically excluded by manager)."""
-        return MessageTemplate.objects.select_related('created_by').order_by('-created_at')
+        queryset = MessageTemplate.objects.order_by('-created_at')
+        # Only the detail serializer reads created_by (created_by_name)
+        if self.action == 'retrieve':
+            queryset = queryset.select_related('created_by')
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -1,10 +1,15 @@
 """
 Message Template model for reusable message content.
 """
+import re
+
 from django.db import models
 
 from core.models import SoftDeleteModel
 
+# Variáveis do conteúdo ({{variable}}), compilado uma vez
+_VARIABLE_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+
 
 class MessageTemplate(SoftDeleteModel):
     """
@@ -89,11 +94,14 @@ class MessageTemplate(SoftDeleteModel):
         """Verifica se o template tem mídia."""
         return self.message_type != self.Type.TEXT and bool(self.media_url)
 
+    @staticmethod
+    def variables_in(content: str) -> list[str]:
+        """Variáveis de um conteúdo ({{variable}}), sem repetições e na ordem em que aparecem."""
+        return list(dict.fromkeys(_VARIABLE_PATTERN.findall(content or '')))
+
     def extract_variables(self) -> list[str]:
         """Extrai variáveis do conteúdo ({{variable}})."""
-        import re
-        pattern = r'\{\{(\w+)\}\}'
-        return re.findall(pattern, self.content)
+        return self.variables_in(self.content)
 
     def render(self, context: dict) -> str:
         """Renderiza o template com as variáveis fornecidas."""
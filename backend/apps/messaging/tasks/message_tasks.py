@@ -3,9 +3,10 @@ Celery tasks for message sending and processing.
 """
 import logging
 
-from celery import shared_task
+from celery import group, shared_task
 from django.db import connection
 from django.utils import timezone
+from kombu.exceptions import OperationalError
 from tenant_schemas_celery.task import TenantTask
 
 from core.utils import apply_tenant_signature
@@ -26,8 +27,19 @@ def send_message_task(self, message_id: int) -> None:
     from core.exceptions import EvolutionAPIError
 
     try:
+        # Mensagem, sessão e supporter em uma única query, só com os campos
+        # usados (os mark_as_* gravam com update_fields, sem recarregar adiados)
         message = Message.objects.select_related(
-            'whatsapp_session', 'template', 'supporter'
+            'whatsapp_session', 'supporter'
+        ).only(
+            'id', 'phone', 'content', 'message_type', 'media_url', 'status',
+            'retry_count', 'supporter_id', 'whatsapp_session_id',
+            'whatsapp_session__id', 'whatsapp_session__instance_name',
+            'whatsapp_session__status', 'whatsapp_session__is_active',
+            'whatsapp_session__messages_sent_today',
+            'whatsapp_session__daily_message_limit',
+            'supporter__id', 'supporter__name', 'supporter__city',
+            'supporter__neighborhood', 'supporter__state',
         ).get(id=message_id)
     except Message.DoesNotExist:
         logger.error(f"Mensagem {message_id} não encontrada")
@@ -85,24 +97,9 @@ def send_message_task(self, message_id: int) -> None:
         external_id = result.get('key', {}).get('id', '')
         whatsapp_id = result.get('messageId', external_id)
 
-        # Marca como enviada
+        # Marca como enviada: a própria linha é o registro do envio
         message.mark_as_sent(external_id=external_id, whatsapp_id=whatsapp_id)
 
-        # Salva na tabela Message para contagem no dashboard
-        from apps.messaging.models import Message
-        Message.objects.create(
-            supporter=message.supporter,
-            campaign_item=message.campaign_item,
-            direction='out',
-            status=Message.Status.SENT,
-            message_type=message.message_type or 'text',
-            content=message.content,
-            media_url=message.media_url,
-            external_id=external_id,
-            whatsapp_id=whatsapp_id,
-            created_at=timezone.now(),
-        )
-
         # Incrementa contador da sessão
         session.increment_message_count()
 
@@ -148,13 +145,14 @@ def batch_send_messages(self, message_ids: list[int]) -> dict:
         'skipped': 0,
     }
 
-    for message_id in message_ids:
-        try:
-            send_message_task.delay(message_id)
-            results['sent'] += 1
-        except Exception as e:
-            logger.error(f"Erro ao enfileirar mensagem {message_id}: {e}")
-            results['failed'] += 1
+    # Uma publicação (group) para o lote todo, na mesma conexão com o broker;
+    # cada envio continua uma task própria (schema, rate limit e retry)
+    try:
+        group(send_message_task.s(message_id) for message_id in message_ids).apply_async()
+        results['sent'] = len(message_ids)
+    except OperationalError as e:
+        logger.error("Erro ao enfileirar lote de %s mensagens: %s", len(message_ids), e)
+        results['failed'] = len(message_ids)
 
     logger.info(f"Batch de mensagens processado: {results}")
     return results
@@ -173,31 +171,32 @@ def retry_failed_messages(self, campaign_id: int) -> dict:
     """
     from apps.messaging.models import Message
 
+    # retry_count < 3 no filtro equivale a Message.can_retry: todas são reenviadas
     failed_messages = Message.objects.filter(
         campaign_id=campaign_id,
         status=Message.Status.FAILED,
         retry_count__lt=3
     )
+    message_ids = list(failed_messages.values_list('id', flat=True))
 
     results = {
-        'total': failed_messages.count(),
+        'total': len(message_ids),
         'requeued': 0,
         'skipped': 0,
     }
 
-    for message in failed_messages:
-        if message.can_retry:
-            # Reseta status para pendente
-            message.status = Message.Status.PENDING
-            message.error_code = ''
-            message.error_message = ''
-            message.save(update_fields=['status', 'error_code', 'error_message', 'updated_at'])
-
-            # Reenfileira
-            send_message_task.delay(message.id)
-            results['requeued'] += 1
-        else:
-            results['skipped'] += 1
+    if message_ids:
+        # Reseta status para pendente em um único UPDATE (update() não aplica auto_now)
+        Message.objects.filter(id__in=message_ids).update(
+            status=Message.Status.PENDING,
+            error_code='',
+            error_message='',
+            updated_at=timezone.now()
+        )
+
+        # Reenfileira em uma única publicação (group)
+        group(send_message_task.s(message_id) for message_id in message_ids).apply_async()
+        results['requeued'] = len(message_ids)
 
     logger.info(f"Retry de mensagens da campanha {campaign_id}: {results}")
     return results
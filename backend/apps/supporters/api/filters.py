@@ -1,10 +1,23 @@
 """
 Filters for Supporters API.
 """
+from datetime import date, timedelta
+
 import django_filters
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
+
+from apps.supporters.models import Supporter, SupporterTag, Tag
+
+# Accepted contact statuses (system tag slugs)
+CONTACT_STATUSES = ('lead', 'apoiador', 'blacklist')
 
-from apps.supporters.models import Supporter, Tag
+
+def _years_before(day, years):
+    """Same calendar day `years` years earlier (Feb 29 falls back to Feb 28)."""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
 
 
 class SupporterFilter(django_filters.FilterSet):
@@ -70,6 +83,8 @@ class SupporterFilter(django_filters.FilterSet):
     def filter_search(self, queryset, name, value):
         """
         Search across multiple fields.
+
+        Each icontains is served by the supporter_search_gin trigram index.
         """
         if not value:
             return queryset
@@ -87,10 +102,7 @@ class SupporterFilter(django_filters.FilterSet):
         if value is None:
             return queryset
 
-        from datetime import date
-        from dateutil.relativedelta import relativedelta
-
-        max_birth_date = date.today() - relativedelta(years=value)
+        max_birth_date = _years_before(date.today(), int(value))
         return queryset.filter(birth_date__lte=max_birth_date)
 
     def filter_age_max(self, queryset, name, value):
@@ -100,10 +112,7 @@ class SupporterFilter(django_filters.FilterSet):
         if value is None:
             return queryset
 
-        from datetime import date
-        from dateutil.relativedelta import relativedelta
-
-        min_birth_date = date.today() - relativedelta(years=value + 1) + relativedelta(days=1)
+        min_birth_date = _years_before(date.today(), int(value) + 1) + timedelta(days=1)
         return queryset.filter(birth_date__gte=min_birth_date)
 
     def filter_contact_status(self, queryset, name, value):
@@ -115,12 +124,10 @@ class SupporterFilter(django_filters.FilterSet):
             return queryset
 
         value = value.lower()
+        if value not in CONTACT_STATUSES:
+            return queryset
 
-        if value == 'lead':
-            return queryset.filter(tags__slug='lead', tags__is_system=True)
-        elif value == 'apoiador':
-            return queryset.filter(tags__slug='apoiador', tags__is_system=True)
-        elif value == 'blacklist':
-            return queryset.filter(tags__slug='blacklist', tags__is_system=True)
-
-        return queryset
+        # Semi-join (EXISTS): no join on tags, so supporters are not duplicated
+        return queryset.filter(Exists(SupporterTag.objects.filter(
+            supporter_id=OuterRef('pk'), tag__slug=value, tag__is_system=True
+        )))
@@ -0,0 +1,31 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('supporters', '0004_add_first_last_name'),
+    ]
+
+    operations = [
+        # Extensão no schema public (presente no search_path de todos os tenants);
+        # compartilhada entre tenants, por isso não é removida no reverse
+        migrations.RunSQL(
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        AddIndexConcurrently(
+            model_name='supporter',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'),
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('phone'), name='gin_trgm_ops'),
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'),
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('city'), name='gin_trgm_ops'),
+                name='supporter_search_gin',
+            ),
+        ),
+    ]
@@ -1,7 +1,9 @@
 """
 Supporter model for political contacts management.
 """
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 from core.models import SoftDeleteModel
 
@@ -148,6 +150,15 @@ class Supporter(SoftDeleteModel):
             models.Index(fields=['city', 'neighborhood']),
             models.Index(fields=['state', 'city']),
             models.Index(fields=['whatsapp_opt_in']),
+            # Trigramas sobre UPPER(campo): mesma expressão gerada por icontains
+            # no PostgreSQL, tornando a busca ILIKE '%termo%' indexável
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                OpClass(Upper('phone'), name='gin_trgm_ops'),
+                OpClass(Upper('email'), name='gin_trgm_ops'),
+                OpClass(Upper('city'), name='gin_trgm_ops'),
+                name='supporter_search_gin',
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -1,11 +1,14 @@
 """
 Tag models for supporter segmentation.
 """
-from django.db import models
+from django.db import connection, models
 from django.utils.text import slugify
 
 from core.models import BaseModel
 
+# Cache em processo dos IDs das tags de sistema: (schema, slug) -> id
+_system_tag_ids = {}
+
 
 class Tag(BaseModel):
     """
@@ -116,6 +119,23 @@ class Tag(BaseModel):
                 created_tags.append(tag)
         return created_tags
 
+    @classmethod
+    def get_system_tag_id(cls, slug):
+        """
+        Retorna o ID da tag de sistema do tenant atual, em cache por processo
+        (tags de sistema não são removidas nem têm o slug alterado).
+        Retorna None se a tag ainda não foi criada (não fica em cache).
+        """
+        key = (connection.schema_name, slug)
+        tag_id = _system_tag_ids.get(key)
+        if tag_id is None:
+            tag_id = cls.objects.filter(
+                slug=slug, is_system=True
+            ).values_list('id', flat=True).first()
+            if tag_id is not None:
+                _system_tag_ids[key] = tag_id
+        return tag_id
+
     @classmethod
     def get_lead_tag(cls):
         """Retorna a tag Lead do tenant atual."""
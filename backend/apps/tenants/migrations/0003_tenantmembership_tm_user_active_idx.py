@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_allow_null_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tenantmembership',
+            index=models.Index(fields=['user', 'is_active'], name='tm_user_active_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0003_tenantmembership_tm_user_active_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignTenantIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign_id', models.BigIntegerField(verbose_name='ID da Campanha')),
+                ('schema_name', models.CharField(max_length=63, verbose_name='Schema')),
+            ],
+            options={
+                'verbose_name': 'Índice de Campanha',
+                'verbose_name_plural': 'Índices de Campanhas',
+                'indexes': [models.Index(fields=['campaign_id'], name='cti_campaign_idx')],
+                'unique_together': {('campaign_id', 'schema_name')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def backfill_campaign_tenant_index(apps, schema_editor):
+    """Registra no índice as campanhas criadas antes dele existir."""
+    Client = apps.get_model('tenants', 'Client')
+    connection = schema_editor.connection
+    quote_name = connection.ops.quote_name
+
+    schema_names = Client.objects.exclude(
+        schema_name='public'
+    ).values_list('schema_name', flat=True)
+
+    with connection.cursor() as cursor:
+        for schema_name in schema_names:
+            # Tenants ainda sem as tabelas de campanhas migradas
+            cursor.execute('SELECT to_regclass(%s)', [f'{schema_name}.campaigns_campaign'])
+            if cursor.fetchone()[0] is None:
+                continue
+            cursor.execute(
+                'INSERT INTO tenants_campaigntenantindex (campaign_id, schema_name) '
+                f'SELECT id, %s FROM {quote_name(schema_name)}.campaigns_campaign '
+                'ON CONFLICT (campaign_id, schema_name) DO NOTHING',
+                [schema_name],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0004_campaigntenantindex'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_campaign_tenant_index, migrations.RunPython.noop),
+    ]
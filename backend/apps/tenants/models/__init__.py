@@ -1,6 +1,7 @@
+from .campaign_index import CampaignTenantIndex
 from .client import Client
 from .domain import Domain
 from .membership import TenantMembership
 from .plan import Plan
 
-__all__ = ['Client', 'Domain', 'Plan', 'TenantMembership']
+__all__ = ['CampaignTenantIndex', 'Client', 'Domain', 'Plan', 'TenantMembership']
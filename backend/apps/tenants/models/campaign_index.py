@@ -0,0 +1,32 @@
+"""
+CampaignTenantIndex model: localiza o schema de uma campanha sem varrer tenants.
+"""
+from django.db import models
+
+
+class CampaignTenantIndex(models.Model):
+    """
+    Tabela de roteamento no schema public (campaign_id -> schema_name).
+
+    Cada schema tem sua própria sequência de IDs, então o mesmo campaign_id
+    pode existir em mais de um tenant; por isso a chave é o par.
+    Mantida pelo signal post_save de Campaign (apps.campaigns.signals).
+    """
+    campaign_id = models.BigIntegerField(
+        verbose_name='ID da Campanha'
+    )
+    schema_name = models.CharField(
+        max_length=63,
+        verbose_name='Schema'
+    )
+
+    class Meta:
+        verbose_name = 'Índice de Campanha'
+        verbose_name_plural = 'Índices de Campanhas'
+        unique_together = ['campaign_id', 'schema_name']
+        indexes = [
+            models.Index(fields=['campaign_id'], name='cti_campaign_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} ({self.schema_name})"
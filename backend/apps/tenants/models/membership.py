@@ -51,6 +51,9 @@ class TenantMembership(models.Model):
         verbose_name_plural = 'Membros do Tenant'
         unique_together = ['user', 'tenant']
         ordering = ['tenant', 'role', 'user']
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='tm_user_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.tenant.name} ({self.get_role_display()})"
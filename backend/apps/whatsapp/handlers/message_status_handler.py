@@ -148,6 +148,7 @@ class MessageStatusHandler(BaseWebhookHandler):
             logger.info(f"   📢 Campanha: {campaign.name}")
             logger.info(f"   Destinatário: {campaign_item.recipient_name}")
             logger.info(f"   Status anterior: {campaign_item.status}")
+            previous_status = campaign_item.status
 
             # Mapeia status da Evolution API para CampaignItem
             status_mapping = {
@@ -170,10 +171,6 @@ class MessageStatusHandler(BaseWebhookHandler):
                 campaign_item.status = CampaignItem.Status.DELIVERED
                 update_fields.extend(['delivered_at'])
 
-                # Atualiza contador da campanha
-                campaign.messages_delivered += 1
-                campaign.save(update_fields=['messages_delivered'])
-
                 update_message = f"✅ MENSAGEM ENTREGUE para {campaign_item.recipient_name}"
 
             elif message_status == 'READ':
@@ -182,10 +179,6 @@ class MessageStatusHandler(BaseWebhookHandler):
                 campaign_item.status = CampaignItem.Status.READ
                 update_fields.extend(['read_at'])
 
-                # Atualiza contador da campanha
-                campaign.messages_read += 1
-                campaign.save(update_fields=['messages_read'])
-
                 update_message = f"📖 MENSAGEM LIDA por {campaign_item.recipient_name}"
 
             elif message_status == 'FAILED':
@@ -193,10 +186,6 @@ class MessageStatusHandler(BaseWebhookHandler):
                 campaign_item.status = CampaignItem.Status.FAILED
                 campaign_item.error_message = f"Falha no envio: {message_status}"
 
-                # Atualiza contador da campanha
-                campaign.messages_failed += 1
-                campaign.save(update_fields=['messages_failed'])
-
                 update_message = f"❌ MENSAGEM FALHOU para {campaign_item.recipient_name}"
 
             elif message_status == 'SERVER_ACK':
@@ -211,17 +200,15 @@ class MessageStatusHandler(BaseWebhookHandler):
             # Salva CampaignItem
             campaign_item.save(update_fields=update_fields)
 
+            # Contadores da campanha: um UPDATE atômico com F() conforme a transição
+            campaign_item.update_campaign_counters(previous_status)
+
             logger.info(
                 f"CampaignItem {campaign_item.id} atualizado: "
                 f"{campaign_item.status} (msg: {message_status})"
             )
 
             logger.info(f"   Status atualizado: {campaign_item.status}")
-            logger.info(f"   📊 Estatísticas da Campanha:")
-            logger.info(f"      ✉️  Enviadas: {campaign.messages_sent}")
-            logger.info(f"      ✅ Entregues: {campaign.messages_delivered}")
-            logger.info(f"      📖 Lidas: {campaign.messages_read}")
-            logger.info(f"      ❌ Falhas: {campaign.messages_failed}")
 
             return {
                 'success': True,
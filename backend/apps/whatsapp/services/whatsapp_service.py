@@ -2,6 +2,7 @@
 WhatsApp Service for Evolution API integration.
 """
 import logging
+import os
 from typing import Any
 
 import httpx
@@ -22,6 +23,24 @@ class WhatsAppService:
         self.base_url = settings.EVOLUTION_API_URL.rstrip('/')
         self.api_key = settings.EVOLUTION_API_KEY
         self.timeout = 30.0
+        self._client = None
+        self._client_pid = None
+
+    def _get_client(self) -> httpx.Client:
+        """
+        Cliente HTTP síncrono compartilhado (pool keep-alive), evitando um
+        handshake TCP/TLS por mensagem. Criado sob demanda e recriado após
+        fork, pois os workers prefork do Celery não podem herdar sockets.
+        """
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = httpx.Client(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                # Só repete falhas de conexão: reenviar POSTs poderia duplicar mensagens
+                transport=httpx.HTTPTransport(retries=3),
+            )
+            self._client_pid = os.getpid()
+        return self._client
 
     def _get_headers(self, api_key: str | None = None) -> dict:
         """Retorna headers para requisições."""
@@ -81,13 +100,12 @@ class WhatsAppService:
         url = f"{self.base_url}{endpoint}"
 
         try:
-            response = httpx.request(
+            response = self._get_client().request(
                 method=method,
                 url=url,
                 headers=self._get_headers(api_key),
                 json=data,
                 params=params,
-                timeout=self.timeout,
             )
 
             if response.status_code >= 400:
@@ -148,6 +148,7 @@ def _handle_messages_update(payload: dict) -> None:
         logger.info(f"   📢 Campanha: {campaign.name}")
         logger.info(f"   Destinatário: {campaign_item.recipient_name}")
         logger.info(f"   Status anterior: {campaign_item.status}")
+        previous_status = campaign_item.status
 
         update_fields = ['status', 'updated_at']
 
@@ -157,10 +158,6 @@ def _handle_messages_update(payload: dict) -> None:
             campaign_item.status = CampaignItem.Status.DELIVERED
             update_fields.extend(['delivered_at'])
 
-            # Atualiza contador da campanha
-            campaign.messages_delivered += 1
-            campaign.save(update_fields=['messages_delivered'])
-
             logger.info(f"   ✅ MENSAGEM ENTREGUE para {campaign_item.recipient_name}")
 
         elif status == 'READ':
@@ -169,10 +166,6 @@ def _handle_messages_update(payload: dict) -> None:
             campaign_item.status = CampaignItem.Status.READ
             update_fields.extend(['read_at'])
 
-            # Atualiza contador da campanha
-            campaign.messages_read += 1
-            campaign.save(update_fields=['messages_read'])
-
             logger.info(f"   📖 MENSAGEM LIDA por {campaign_item.recipient_name}")
 
         elif status == 'FAILED':
@@ -180,10 +173,6 @@ def _handle_messages_update(payload: dict) -> None:
             campaign_item.status = CampaignItem.Status.FAILED
             campaign_item.error_message = f"Falha no envio: {status}"
 
-            # Atualiza contador da campanha
-            campaign.messages_failed += 1
-            campaign.save(update_fields=['messages_failed'])
-
             logger.info(f"   ❌ MENSAGEM FALHOU para {campaign_item.recipient_name}")
 
         elif status == 'SERVER_ACK':
@@ -198,15 +187,13 @@ def _handle_messages_update(payload: dict) -> None:
         # Salva CampaignItem
         campaign_item.save(update_fields=update_fields)
 
+        # Contadores da campanha: um UPDATE atômico com F() conforme a transição
+        campaign_item.update_campaign_counters(previous_status)
+
         logger.info(
             f"CampaignItem {campaign_item.id} atualizado: "
             f"{campaign_item.status} (msg: {status})"
         )
-        logger.info(f"   📊 Estatísticas da Campanha:")
-        logger.info(f"      ✉️  Enviadas: {campaign.messages_sent}")
-        logger.info(f"      ✅ Entregues: {campaign.messages_delivered}")
-        logger.info(f"      📖 Lidas: {campaign.messages_read}")
-        logger.info(f"      ❌ Falhas: {campaign.messages_failed}")
         return
 
     # 2. Se não for CampaignItem, tenta atualizar modelo Message (compatibilidade)
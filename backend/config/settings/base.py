@@ -4,6 +4,7 @@ Django base settings for VoxPop project.
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
 from decouple import config
 from kombu import Queue
 
@@ -144,6 +145,15 @@ CACHES = {
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Argon2id primeiro para novas senhas; os demais mantêm a verificação de hashes legados
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -247,6 +257,7 @@ CELERY_ENABLE_UTC = True
 CELERY_TASK_QUEUES = [
     Queue('default'),
     Queue('campaigns'),
+    Queue('campaigns_send'),
     Queue('messages_high'),
     Queue('messages_low'),
     Queue('webhooks'),
@@ -254,6 +265,7 @@ CELERY_TASK_QUEUES = [
 ]
 
 CELERY_TASK_ROUTES = {
+    'apps.campaigns.tasks.send_campaign_item': {'queue': 'campaigns_send'},
     'apps.campaigns.tasks.*': {'queue': 'campaigns'},
     'apps.messaging.tasks.send_*': {'queue': 'messages_high'},
     'apps.messaging.tasks.batch_*': {'queue': 'messages_low'},
@@ -262,10 +274,21 @@ CELERY_TASK_ROUTES = {
     'apps.dashboard.tasks.*': {'queue': 'analytics'},
 }
 
+# Tasks longas (campanhas): ack só ao final e um único prefetch por processo,
+# junto com `-O fair` nos workers, para não enfileirar atrás de um filho ocupado
 CELERY_TASK_ACKS_LATE = True
 CELERY_TASK_REJECT_ON_WORKER_LOST = True
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 
+# Métricas diárias materializadas (DailyMetrics) dos últimos dias fechados, lidas
+# pelo dashboard; a cada hora, para incluir entregas e leituras que chegam depois
+CELERY_BEAT_SCHEDULE = {
+    'calculate-all-tenants-daily-metrics': {
+        'task': 'apps.dashboard.tasks.metrics_tasks.calculate_all_tenants_daily_metrics',
+        'schedule': crontab(minute=5),
+    },
+}
+
 # Cache de tenant para tasks (performance)
 CELERY_TASK_TENANT_CACHE_SECONDS = 30
 
@@ -69,7 +69,6 @@ CELERY_TIMEZONE = 'America/Sao_Paulo'
 CELERY_WORKER_CONCURRENCY = int(os.getenv('CELERY_WORKER_CONCURRENCY') or '4')
 CELERY_TASK_ALWAYS_EAGER = False
 CELERY_WORKER_LOGLEVEL = 'INFO'
-CELERY_BEAT_SCHEDULE = {}
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
 CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutos
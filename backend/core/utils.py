@@ -2,8 +2,12 @@
 Utility functions for VoxPop.
 """
 import re
+from functools import lru_cache
 from typing import Any
 
+NON_DIGIT_RE = re.compile(r'\D')
+TEMPLATE_VARIABLE_RE = re.compile(r'\{\{([^{}]+)\}\}')
+
 
 def clean_phone_number(phone: str) -> str:
     """
@@ -24,7 +28,7 @@ def clean_phone_number(phone: str) -> str:
         return ''
 
     # Remove all non-digit characters
-    digits = re.sub(r'\D', '', phone)
+    digits = NON_DIGIT_RE.sub('', phone)
 
     # Add Brazil country code if not present
     if len(digits) == 11:  # DDD + 9 digits
@@ -57,7 +61,7 @@ def format_phone_display(phone: str) -> str:
     Example:
         format_phone_display("5511999999999") -> "+55 (11) 99999-9999"
     """
-    digits = re.sub(r'\D', '', phone)
+    digits = NON_DIGIT_RE.sub('', phone)
 
     if len(digits) == 13:  # +55 11 99999-9999
         return f"+{digits[:2]} ({digits[2:4]}) {digits[4:9]}-{digits[9:]}"
@@ -77,7 +81,7 @@ def clean_document(document: str) -> str:
     Returns:
         Document with only digits
     """
-    return re.sub(r'\D', '', document)
+    return NON_DIGIT_RE.sub('', document)
 
 
 def format_cpf(cpf: str) -> str:
@@ -156,6 +160,38 @@ def validate_cnpj(cnpj: str) -> bool:
     return True
 
 
+class CompiledTemplate:
+    """
+    Template with {{variable}} placeholders parsed once into literal and
+    variable parts, so rendering is a single join.
+    """
+
+    __slots__ = ('_literals', '_variables')
+
+    def __init__(self, template: str):
+        parts = TEMPLATE_VARIABLE_RE.split(template)
+        # split() alternates literal text and captured variable names
+        self._literals = parts[0::2]
+        self._variables = parts[1::2]
+
+    def render(self, context: dict[str, Any]) -> str:
+        if not self._variables:
+            # Static content: nothing to substitute
+            return self._literals[0]
+        out = [self._literals[0]]
+        for name, literal in zip(self._variables, self._literals[1:], strict=True):
+            # Unknown variables are kept as-is
+            out.append(str(context[name]) if name in context else f"{{{{{name}}}}}")
+            out.append(literal)
+        return ''.join(out)
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> CompiledTemplate:
+    """Return the compiled form of a template (cached per template string)."""
+    return CompiledTemplate(template)
+
+
 def render_template_variables(template: str, context: dict[str, Any]) -> str:
     """
     Render template with variables using {{variable}} syntax.
@@ -171,11 +207,8 @@ def render_template_variables(template: str, context: dict[str, Any]) -> str:
         render_template_variables("Ola {{name}}!", {"name": "Joao"})
         -> "Ola Joao!"
     """
-    result = template
-    for key, value in context.items():
-        placeholder = f"{{{{{key}}}}}"
-        result = result.replace(placeholder, str(value))
-    return result
+    return compile_template(template).render(context)
+
 
 def apply_tenant_signature(tenant, content: str, context: dict[str, Any]) -> str:
     """